@@ -1,31 +1,57 @@
+import os
+import statistics
+from collections import defaultdict
 import matplotlib.pyplot as plt
+from benchmark import load_results, RESULT_JSON
 
-# Top-K categories
-categories = ["TOP 20", "TOP 40", "TOP 60", "TOP 80", "TOP 100"]
-
-# Runtime data for 5,000,000 transactions
-naive_avg = [727.8721, 762.4198, 815.555, 836.1751, 843.6318]
-heuristic_avg = [827.4073, 840.6344, 856.9411, 863.1453, 904.9607]
-user_define_avg = [585.2622, 622.7732, 631.9967, 642.9455, 651.6969]
-
-# X-axis positions
-x = range(len(categories))
-width = 0.25
-
-# Plotting
-plt.figure(figsize=(10, 6))
-plt.bar([i - width for i in x], user_define_avg, width=width, label="User Define", color="#1f77b4")
-plt.bar(x, naive_avg, width=width, label="Naive", color="#ff7f0e")
-plt.bar([i + width for i in x], heuristic_avg, width=width, label="Heuristic", color="#2ca02c")
-
-# Labels and styling
-plt.xticks(ticks=x, labels=categories)
-plt.xlabel("Top-K")
-plt.ylabel("Run Time (seconds)")
-plt.title("Run Time Comparison (5,000,000 Transactions)")
-plt.legend()
-plt.grid(axis='y', linestyle='--', alpha=0.7)
-plt.tight_layout()
-
-# Save to file
-plt.savefig('analysis/analysis_col_chart_5000000_transactions.pdf')
+ROOT = os.path.abspath(os.path.dirname(__file__))
+# Variant -> (label, color), in the bar order of the original charts
+SERIES = {
+    "user_define_bayes_miner": ("User Define", "#1f77b4"),
+    "naive_bayes_miner": ("Naive", "#ff7f0e"),
+    "heuristic_bayes_miner": ("Heuristic", "#2ca02c"),
+}
+
+
+def plot_runtime(transactions: int, mean_seconds: dict, top_ks: list):
+    # Top-K categories
+    categories = [f"TOP {top_k}" for top_k in top_ks]
+
+    # X-axis positions
+    x = range(len(categories))
+    width = 0.25
+
+    # Plotting
+    plt.figure(figsize=(10, 6))
+    for offset, (variant, (label, color)) in zip((-width, 0, width), SERIES.items()):
+        if variant in mean_seconds:
+            plt.bar([i + offset for i in x], [mean_seconds[variant].get(top_k, 0) for top_k in top_ks], width=width, label=label, color=color)
+
+    # Labels and styling
+    plt.xticks(ticks=x, labels=categories)
+    plt.xlabel("Top-K")
+    plt.ylabel("Run Time (seconds)")
+    plt.title(f"Run Time Comparison ({transactions:,} Transactions)")
+    plt.legend()
+    plt.grid(axis='y', linestyle='--', alpha=0.7)
+    plt.tight_layout()
+
+    # Save to file
+    plt.savefig(os.path.join(ROOT, "analysis", f"analysis_col_chart_{transactions}_transactions.pdf"))
+    plt.close()
+
+
+def plot_results(records: list):
+    # Average the measured repetitions per (database size, variant, top-K)
+    by_size: dict[int, dict[str, dict[int, float]]] = defaultdict(lambda: defaultdict(dict))
+    for record in records:
+        by_size[record["transactions"]][record["variant"]][record["top_k"]] = statistics.mean(record["seconds"])
+
+    for transactions, mean_seconds in sorted(by_size.items()):
+        top_ks = sorted({top_k for seconds in mean_seconds.values() for top_k in seconds})
+        plot_runtime(transactions, mean_seconds, top_ks)
+
+
+if __name__ == "__main__":
+    # Charts come from the measurements benchmark.py wrote; run it first
+    plot_results(load_results(RESULT_JSON))
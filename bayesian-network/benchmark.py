@@ -0,0 +1,208 @@
+import argparse
+import csv
+import importlib
+import inspect
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows: no peak RSS
+    resource = None
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+VARIANTS = ["naive_bayes_miner", "heuristic_bayes_miner", "user_define_bayes_miner"]
+SIZES = [1000, 2000, 5000, 10000, 20000, 50000, 100000, 200000, 500000, 1000000, 2000000, 5000000]
+TOP_KS = [20, 40, 60, 80, 100]
+MIN_SUP = 0.5
+WARMUP = 1
+REPEAT = 3
+SEED = 8
+DATASET_DIR = os.path.join(ROOT, "data", "benchmark")
+RESULT_JSON = os.path.join(ROOT, "analysis", "benchmark_results.json")
+RESULT_CSV = os.path.join(ROOT, "analysis", "benchmark_results.csv")
+
+# Synthetic databases follow the shape of the original newdata8 sets: single-letter items, a handful per transaction
+ITEMS = [chr(ord("A") + index) for index in range(26)]
+MAX_ITEMS_PER_TRANSACTION = 8
+
+
+def dataset_path(transactions: int, seed: int = SEED):
+    return os.path.join(DATASET_DIR, f"database_{transactions}_seed{seed}.txt")
+
+
+def generate_dataset(transactions: int, seed: int = SEED):
+    # Written once per (size, seed) in the SPMF format MergedDataReader reads, so every run sees the same database
+    path = dataset_path(transactions, seed)
+    if os.path.exists(path):
+        return path
+    os.makedirs(DATASET_DIR, exist_ok=True)
+    rng = random.Random(f"{seed}:{transactions}")
+    weights = [1 / (rank + 1) for rank in range(len(ITEMS))]
+    with open(path + ".tmp", "w") as file:
+        for _ in range(transactions):
+            count = rng.randint(1, MAX_ITEMS_PER_TRANSACTION)
+            items = sorted(set(rng.choices(ITEMS, weights, k=count)))
+            utilities = [rng.randint(1, 10) * rng.randint(1, 10) for _ in items]
+            probabilities = [round(rng.uniform(0.5, 1.0), 2) for _ in items]
+            file.write(f"{' '.join(items)}:{sum(utilities)}:{' '.join(map(str, utilities))}:{' '.join(map(str, probabilities))}\n")
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def peak_memory_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, kilobytes on Linux
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def measure(variant: str, path: str, top_k: int | list, min_sup: float, warmup: int, repeat: int, processes: int):
+    # Runs inside a fresh interpreter: the variants share module names, and peak RSS must not leak between runs
+    sys.path.insert(0, os.path.join(ROOT, variant))
+    sys.path.insert(0, ROOT)
+    from data.data_reader import MergedDataReader
+    bayes_miner = importlib.import_module("bayes_miner")
+    helper = importlib.import_module("helper")
+
+    reader = MergedDataReader(path)
+    start = time.perf_counter()
+    utility_dict = helper.create_utility_dict_from_reader(reader)
+    load_seconds = time.perf_counter() - start
+
+    parameters = inspect.signature(bayes_miner.BayesianMiner).parameters
+    kwargs = {"utility_dict": utility_dict, "top_k": top_k, "min_sup": min_sup}
+    if "transactions" in parameters:
+        kwargs.update(transactions=reader.transactions, database_utility=reader.database_utility)
+
+    seconds = []
+    timings = []
+    for run in range(warmup + repeat):
+        miner = bayes_miner.BayesianMiner(**kwargs)
+        start = time.perf_counter()
+        miner.run(processes=processes)
+        if run >= warmup:
+            seconds.append(time.perf_counter() - start)
+            timings.append(miner.timings)
+
+    result = {
+        "transactions": reader.transactions,
+        "load_seconds": load_seconds,
+        "seconds": seconds,
+        "peak_memory_kb": peak_memory_kb(),
+        "top_k_utility": [item.sum_utility for item in miner.get_top_k_candidates()]
+    }
+    if isinstance(top_k, list):
+        # One mining pass for every K: the joins are the shared cost, each K's own search replay its per-K cost
+        result["shared_seconds"] = [timing["shared"] for timing in timings]
+        result["per_k_seconds"] = {k: [timing["per_k"][k] for timing in timings] for k in top_k}
+        result["top_k_utility"] = {k: [item.sum_utility for item in miner.get_top_k_candidates(k)] for k in top_k}
+    return result
+
+
+def run_measurement(variant: str, path: str, top_k: int | list, args):
+    command = [
+        sys.executable, os.path.abspath(__file__), "--measure", variant, path, ",".join(map(str, top_k)) if isinstance(top_k, list) else str(top_k),
+        "--min-sup", str(args.min_sup), "--warmup", str(args.warmup), "--repeat", str(args.repeat),
+        "--processes", str(args.processes)
+    ] + (["--multi-k"] if isinstance(top_k, list) else [])
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"{variant} top {top_k} on {path} failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def summarize(record: dict):
+    seconds = record["seconds"]
+    record["mean_seconds"] = statistics.mean(seconds)
+    record["min_seconds"] = min(seconds)
+    record["stdev_seconds"] = statistics.stdev(seconds) if len(seconds) > 1 else 0.0
+    return record
+
+
+def write_results(records: list, json_path: str, csv_path: str):
+    os.makedirs(os.path.dirname(json_path), exist_ok=True)
+    with open(json_path, "w") as file:
+        json.dump(records, file, indent=2)
+
+    fields = ["variant", "transactions", "top_k", "min_sup", "processes", "repetition", "seconds", "shared_seconds", "load_seconds", "peak_memory_kb"]
+    with open(csv_path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=fields)
+        writer.writeheader()
+        for record in records:
+            for repetition, seconds in enumerate(record["seconds"]):
+                shared_seconds = record["shared_seconds"][repetition] if "shared_seconds" in record else None
+                writer.writerow({**{field: record.get(field) for field in fields}, "repetition": repetition, "seconds": seconds, "shared_seconds": shared_seconds})
+
+
+def load_results(json_path: str = RESULT_JSON):
+    with open(json_path) as file:
+        return json.load(file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the naive, heuristic and user-define Bayesian miners")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--top-k", type=int, nargs="+", default=TOP_KS)
+    parser.add_argument("--variants", nargs="+", default=VARIANTS, choices=VARIANTS)
+    parser.add_argument("--data", nargs="+", help="SPMF files to benchmark instead of the generated databases")
+    parser.add_argument("--min-sup", type=float, default=MIN_SUP)
+    parser.add_argument("--warmup", type=int, default=WARMUP)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--multi-k", action="store_true", help="mine every --top-k in one pass per variant and database")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--json", default=RESULT_JSON)
+    parser.add_argument("--csv", default=RESULT_CSV)
+    parser.add_argument("--no-charts", action="store_true")
+    parser.add_argument("--measure", nargs=3, metavar=("VARIANT", "PATH", "TOP_K"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        variant, path, top_k = args.measure
+        top_k = [int(k) for k in top_k.split(",")] if args.multi_k else int(top_k)
+        print(json.dumps(measure(variant, path, top_k, args.min_sup, args.warmup, args.repeat, args.processes)))
+        return
+
+    paths = args.data or [generate_dataset(size, args.seed) for size in args.sizes]
+    records = []
+    sweeps = [sorted(args.top_k)] if args.multi_k else args.top_k
+    for path in paths:
+        for sweep in sweeps:
+            for variant in args.variants:
+                result = run_measurement(variant, path, sweep, args)
+                for top_k in (sweep if args.multi_k else [sweep]):
+                    record = {
+                        "variant": variant,
+                        "dataset": os.path.relpath(path, ROOT),
+                        "top_k": top_k,
+                        "min_sup": args.min_sup,
+                        "processes": args.processes,
+                        "warmup": args.warmup,
+                        **result
+                    }
+                    if args.multi_k:
+                        # seconds is this K's own cost; shared_seconds is paid once for the whole sweep
+                        # (the per-K results come back through JSON, keyed by str(K))
+                        record["seconds"] = result["per_k_seconds"][str(top_k)]
+                        record["top_k_utility"] = result["top_k_utility"][str(top_k)]
+                        del record["per_k_seconds"]
+                    records.append(summarize(record))
+                    print(f"{variant:<24} {record['transactions']:>8} transactions  top {top_k:<4} "
+                          f"mean {record['mean_seconds']:.4f}s  min {record['min_seconds']:.4f}s  peak {record['peak_memory_kb']} KB")
+                # Rewrite after every measurement so an interrupted sweep keeps what it has
+                write_results(records, args.json, args.csv)
+
+    if not args.no_charts:
+        import analysis
+        analysis.plot_results(records)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import time
+from typing import Iterator
+
+# SPMF utility format extended with existential probabilities, one transaction per line:
+#   items:transaction_utility:item_utilities:item_probabilities
+# e.g. "1 3 4:17:5 10 2:0.8 0.65 0.9". Lines starting with '#', '%' or '@' are SPMF metadata.
+DEFAULT_CHUNK_SIZE = 1 << 24
+COMMENT_PREFIXES = (b"#", b"%", b"@")
+
+
+class MergedDataReader:
+    def __init__(self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.transactions = 0
+        self.database_utility = 0
+        self.seconds = 0.0
+
+    @property
+    def throughput(self):
+        return self.transactions / self.seconds if self.seconds else 0.0
+
+    def __parse(self, line: bytes):
+        line = line.strip()
+        if not line or line.startswith(COMMENT_PREFIXES):
+            return None
+        fields = line.split(b":")
+        items = [item.decode() for item in fields[0].split()]
+        utilities = [float(utility) for utility in fields[-2].split()]
+        probabilities = [float(probability) for probability in fields[-1].split()]
+        if not len(items) == len(utilities) == len(probabilities):
+            raise ValueError(f"{self.path}: malformed transaction {line[:80]!r}")
+        return items, utilities, probabilities
+
+    def __lines(self) -> Iterator[bytes]:
+        # Read big blocks and split them ourselves; the partial last line is carried into the next block
+        with open(self.path, "rb") as file:
+            pending = b""
+            while True:
+                chunk = file.read(self.chunk_size)
+                if not chunk:
+                    break
+                lines = (pending + chunk).split(b"\n")
+                pending = lines.pop()
+                yield from lines
+            if pending:
+                yield pending
+
+    def __iter__(self) -> Iterator[tuple[list[str], list[float], list[float]]]:
+        self.transactions = 0
+        self.database_utility = 0
+        start = time.perf_counter()
+        try:
+            for line in self.__lines():
+                transaction = self.__parse(line)
+                if transaction is None:
+                    continue
+                self.transactions += 1
+                self.database_utility += sum(transaction[1])
+                yield transaction
+        finally:
+            self.seconds = time.perf_counter() - start
+
+    def partitions(self, transactions: int) -> Iterator[list[tuple[list[str], list[float], list[float]]]]:
+        # Consecutive runs of at most this many transactions, for partitioned (out-of-core) mining
+        partition = []
+        for transaction in self:
+            partition.append(transaction)
+            if len(partition) == transactions:
+                yield partition
+                partition = []
+        if partition:
+            yield partition
+
+
+def read_merged_data(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    # Whole database as the list of dicts create_utility_dict takes; use MergedDataReader for big files
+    return [
+        {
+            "items": items,
+            "quantities": [1] * len(items),
+            "profits": utilities,
+            "probabilities": probabilities
+        }
+        for items, utilities, probabilities in MergedDataReader(path, chunk_size)
+    ]
+
+
+def read_merged_columns(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    # Whole database as flat columns for create_utility_dict_from_columns:
+    # (offsets, item ids, utilities, probabilities, item names), with quantities all 1 and the utilities as profits
+    import numpy as np
+    ids: dict[str, int] = dict()
+    offsets, items, utilities, probabilities = [0], [], [], []
+    for transaction_items, transaction_utilities, transaction_probabilities in MergedDataReader(path, chunk_size):
+        items.extend(ids.setdefault(item, len(ids)) for item in transaction_items)
+        utilities.extend(transaction_utilities)
+        probabilities.extend(transaction_probabilities)
+        offsets.append(len(items))
+    return (np.array(offsets, dtype=np.int64), np.array(items, dtype=np.int64), np.array(utilities), np.array(probabilities), list(ids))
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import struct
+import numpy as np
+
+# Binary index of the single-item utility lists, opened with np.memmap instead of re-parsing the source:
+#   magic | header length (uint64 LE) | JSON header, padded to 8 bytes | tids (int64) | probabilities | utilities | remaining utilities
+# Each column holds every item's entries back to back; the header records where each item starts and how many it has,
+# plus the source file (size, mtime, sha256) and the preprocessing parameters the lists were built with.
+INDEX_MAGIC = b"BNUIDX01"
+INDEX_VERSION = 1
+COLUMN_DTYPES = (np.int64, np.float64, np.float64, np.float64)
+HASH_BLOCK_SIZE = 1 << 24
+
+
+def default_index_path(source_path: str, parameters: dict):
+    # One index per set of parameters next to the source, so variants built with different ones keep their own
+    return f"{source_path}.{','.join(f'{name}={value}' for name, value in sorted(parameters.items()))}.uidx"
+
+
+def file_digest(path: str):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class UtilityIndex:
+    def __init__(self, path: str, header: dict, data_offset: int):
+        self.path = path
+        self.header = header
+        self.transactions: int = header["transactions"]
+        self.database_utility: float = header["database_utility"]
+        self.__data_offset = data_offset
+
+    @staticmethod
+    def write(path: str, columns: dict, source_path: str, parameters: dict, transactions: int, database_utility: float):
+        # columns: item name -> (tids, probabilities, utilities, remaining utilities), as the helpers build them
+        stat = os.stat(source_path)
+        items, start = [], 0
+        for name, column in columns.items():
+            items.append([list(name), start, len(column[0])])
+            start += len(column[0])
+        header = {
+            "version": INDEX_VERSION,
+            "source": {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_digest(source_path)},
+            "parameters": parameters,
+            "transactions": transactions,
+            "database_utility": database_utility,
+            "entries": start,
+            "items": items
+        }
+        encoded = json.dumps(header).encode()
+        encoded += b" " * (-len(encoded) % 8)
+
+        # Written beside the target and swapped in, so a reader never maps a half-written index
+        with open(path + ".tmp", "wb") as file:
+            file.write(INDEX_MAGIC + struct.pack("<Q", len(encoded)) + encoded)
+            for position, dtype in enumerate(COLUMN_DTYPES):
+                for column in columns.values():
+                    file.write(np.asarray(column[position], dtype=dtype).tobytes())
+        os.replace(path + ".tmp", path)
+        return UtilityIndex(path, header, len(INDEX_MAGIC) + 8 + len(encoded))
+
+    @staticmethod
+    def open(path: str, source_path: str, parameters: dict):
+        # None when there is no index yet, or it was built from another source or with other parameters
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as file:
+            if file.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                return None
+            (length,) = struct.unpack("<Q", file.read(8))
+            header = json.loads(file.read(length))
+        if header.get("version") != INDEX_VERSION or header["parameters"] != parameters:
+            return None
+
+        stat = os.stat(source_path)
+        source = header["source"]
+        if stat.st_size != source["size"]:
+            return None
+        # An untouched source is trusted by size and mtime; a touched one is re-hashed before the index is reused
+        if stat.st_mtime_ns != source["mtime_ns"]:
+            if file_digest(source_path) != source["sha256"]:
+                return None
+            # Same content: record the new mtime, so the next open trusts it without hashing again
+            source["mtime_ns"] = stat.st_mtime_ns
+            UtilityIndex.__rewrite_header(path, header, length)
+        return UtilityIndex(path, header, len(INDEX_MAGIC) + 8 + length)
+
+    @staticmethod
+    def __rewrite_header(path: str, header: dict, length: int):
+        # In place, padded to the old length; a header that no longer fits (or an index we may not write) is left as
+        # it was and the source is only re-hashed again next time
+        encoded = json.dumps(header).encode()
+        if len(encoded) > length:
+            return
+        try:
+            with open(path, "r+b") as file:
+                file.seek(len(INDEX_MAGIC) + 8)
+                file.write(encoded + b" " * (length - len(encoded)))
+        except OSError:
+            pass
+
+    def items(self):
+        # (name, (tids, probabilities, utilities, remaining utilities)) with every column a read-only memmap slice
+        entries = self.header["entries"]
+        if not entries:
+            return
+        offset = self.__data_offset
+        maps = []
+        for dtype in COLUMN_DTYPES:
+            maps.append(np.memmap(self.path, dtype=dtype, mode="r", offset=offset, shape=(entries,)))
+            offset += entries * np.dtype(dtype).itemsize
+        for name, start, count in self.header["items"]:
+            yield tuple(name), tuple(column[start:start + count] for column in maps)
@@ -1,25 +1,11 @@
-from utility_item import UtilityItem
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-def create_utility_dict(database: list):
-    utilities: dict[tuple[str], UtilityItem] = dict()
-
-    for transaction_id, transaction in enumerate(database):
-        items: list = transaction.get("items")
-        quantities: list = transaction.get("quantities")
-        probabilities: list = transaction.get("probabilities")
-        profits: list = transaction.get("profits")
-
-        remaining_utility = sum(q * p for q, p in zip(quantities, profits))
-
-        for index in range(len(items)):
-            item_name = tuple([items[index]])
-            if item_name not in utilities:
-                utilities[item_name] = UtilityItem(item=item_name)
-            item_utility = quantities[index] * profits[index]
-            remaining_utility -= item_utility
-            utilities[item_name].set_utility(transaction_id, probabilities[index], item_utility, remaining_utility)
-            
-    return utilities
+# The utility-list builders live in mining_kernel, shared by all three variants; the heuristic lists are unweighted
+from mining_kernel.builders import (
+    create_utility_dict, create_utility_dict_from_reader, create_utility_dict_from_columns, create_utility_dict_from_index
+)
 
 def get_number_of_transaction(database: list):
     return len(database)
@@ -0,0 +1,146 @@
+from array import array
+import numpy as np
+from mining_kernel.utility_item import UtilityItem, PairTable
+from mining_kernel.strategies import ItemWeighting
+from data.data_reader import MergedDataReader
+from data.utility_index import UtilityIndex, default_index_path
+
+# Builders of the single-item utility lists, shared by the three variants: each is configured with the variant's
+# ItemWeighting (factors of an item, and the direction a transaction is walked in).
+
+
+def _new_columns():
+    # tids, probabilities, utilities, remaining utilities
+    return array("q"), array("d"), array("d"), array("d")
+
+def _append_transaction(columns: dict, transaction_id: int, items: list, utilities: list, probabilities: list, weighting: ItemWeighting, pair_table: PairTable = None):
+    factors = [weighting.factors(item) for item in items]
+    utilities = [utility * utility_factor for utility, (utility_factor, _) in zip(utilities, factors)]
+    probabilities = [probability * probability_factor for probability, (_, probability_factor) in zip(probabilities, factors)]
+
+    def append(index: int, remaining_utility: float):
+        item_name = tuple([items[index]])
+        if item_name not in columns:
+            columns[item_name] = _new_columns()
+        tids, item_probabilities, item_utilities, remaining_utilities = columns[item_name]
+        tids.append(transaction_id)
+        item_probabilities.append(probabilities[index])
+        item_utilities.append(utilities[index])
+        remaining_utilities.append(remaining_utility)
+
+    if weighting.backwards:
+        # Remaining utility accumulated from the last item
+        order = range(len(items) - 1, -1, -1)
+        remaining_utility = 0
+        for index in order:
+            append(index, remaining_utility)
+            remaining_utility += utilities[index]
+        transaction_utility = remaining_utility
+    else:
+        # Transaction utility, less each item in turn
+        order = range(len(items))
+        transaction_utility = remaining_utility = sum(utilities)
+        for index in order:
+            remaining_utility -= utilities[index]
+            append(index, remaining_utility)
+
+    if pair_table is not None:
+        # Pairs are keyed by name, so the probabilities and utilities only need to stay aligned with the items
+        pair_table.add_transaction([items[index] for index in order], [probabilities[index] for index in order], transaction_utility, [utilities[index] for index in order])
+
+def _position_groups(offsets):
+    # Entry -> transaction id, and the entries at each position 0, 1, ... of their transaction, so a per-transaction
+    # running sum can be vectorized across all transactions while keeping the loop's order of additions
+    lengths = np.diff(offsets)
+    transaction_ids = np.repeat(np.arange(len(lengths)), lengths)
+    positions = np.arange(offsets[-1]) - np.repeat(offsets[:-1], lengths)
+    by_position = np.argsort(positions, kind="stable")
+    bounds = np.searchsorted(positions[by_position], np.arange(lengths.max(initial=0) + 1))
+    return transaction_ids, positions, [by_position[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+
+def _group_by_item(items, item_names, first_seen, columns):
+    # Stable argsort keeps each item's entries in transaction order; items come out in first-seen order, like the loop's dict
+    order = np.argsort(items, kind="stable")
+    sorted_items = items[order]
+    starts = np.flatnonzero(np.r_[True, sorted_items[1:] != sorted_items[:-1]]) if len(order) else np.zeros(0, dtype=np.int64)
+    ends = np.r_[starts[1:], len(order)].astype(np.int64)
+    columns = [column[order] for column in columns]
+    utility_dict = dict()
+    for group in np.argsort(first_seen[order[starts]], kind="stable"):
+        item = sorted_items[starts[group]]
+        name = (item_names[item] if item_names is not None else str(item),)
+        start, end = starts[group], ends[group]
+        utility_dict[name] = UtilityItem(name, *(column[start:end] for column in columns))
+    return utility_dict
+
+def create_utility_dict(database: list, pair_table: PairTable = None, first_transaction_id: int = 0, weighting: ItemWeighting = None):
+    weighting = weighting or ItemWeighting()
+    columns: dict[tuple[str], tuple[array, array, array, array]] = dict()
+    for transaction_id, transaction in enumerate(database, first_transaction_id):
+        quantities: list = transaction.get("quantities")
+        profits: list = transaction.get("profits")
+        utilities = [q * p for q, p in zip(quantities, profits)]
+        _append_transaction(columns, transaction_id, transaction.get("items"), utilities, transaction.get("probabilities"), weighting, pair_table)
+
+    if pair_table is not None:
+        pair_table.freeze()
+    return {name: UtilityItem(name, *column) for name, column in columns.items()}
+
+def create_utility_dict_from_reader(reader: MergedDataReader, pair_table: PairTable = None, first_transaction_id: int = 0, weighting: ItemWeighting = None):
+    # Single streaming pass over a MergedDataReader; the list-of-dicts database is never built
+    weighting = weighting or ItemWeighting()
+    columns: dict[tuple[str], tuple[array, array, array, array]] = dict()
+    for transaction_id, (items, utilities, probabilities) in enumerate(reader, first_transaction_id):
+        _append_transaction(columns, transaction_id, items, utilities, probabilities, weighting, pair_table)
+
+    if pair_table is not None:
+        pair_table.freeze()
+    return {name: UtilityItem(name, *column) for name, column in columns.items()}
+
+def create_utility_dict_from_columns(offsets, items, quantities, profits, probabilities, item_names: list = None, first_transaction_id: int = 0, weighting: ItemWeighting = None):
+    # Vectorized build from flat columns: transaction t holds entries offsets[t]:offsets[t + 1] of items (integer ids,
+    # named by item_names), quantities, profits and probabilities. Same lists as create_utility_dict.
+    weighting = weighting or ItemWeighting()
+    offsets = np.asarray(offsets, dtype=np.int64)
+    items = np.asarray(items, dtype=np.int64)
+    names = item_names if item_names is not None else [str(item) for item in range(items.max(initial=-1) + 1)]
+    factors = np.array([weighting.factors(name) for name in names], dtype=np.float64).reshape(-1, 2)[items]
+    utilities = np.asarray(quantities, dtype=np.float64) * np.asarray(profits, dtype=np.float64) * factors[:, 0]
+    probabilities = np.asarray(probabilities, dtype=np.float64) * factors[:, 1]
+    transaction_ids, positions, groups = _position_groups(offsets)
+
+    running = np.zeros(len(offsets) - 1)
+    remaining = np.empty(len(items))
+    if weighting.backwards:
+        # Suffix sums: each entry gets the utility of the entries after it, accumulated from the end like the loop does
+        for entries in reversed(groups):
+            remaining[entries] = running[transaction_ids[entries]]
+            running[transaction_ids[entries]] += utilities[entries]
+        # The loop walks each transaction backwards, so an item is first seen at its last position in its first transaction
+        lengths = np.diff(offsets)
+        first_seen = transaction_ids * (lengths.max(initial=0) + 1) + np.repeat(lengths, lengths) - positions
+    else:
+        # Transaction utility, then what is left of it after each entry
+        for entries in groups:
+            running[transaction_ids[entries]] += utilities[entries]
+        for entries in groups:
+            running[transaction_ids[entries]] -= utilities[entries]
+            remaining[entries] = running[transaction_ids[entries]]
+        first_seen = np.arange(len(items))
+    return _group_by_item(items, item_names, first_seen, (transaction_ids + first_transaction_id, probabilities, utilities, remaining))
+
+def create_utility_dict_from_index(source_path: str, index_path: str = None, weighting: ItemWeighting = None):
+    # Single-item lists from a memory-mapped index of source_path, built with one streaming pass when it is missing
+    # or stale. The index is returned too: it carries the transactions / database_utility of the source.
+    weighting = weighting or ItemWeighting()
+    parameters = weighting.parameters()
+    index_path = index_path or default_index_path(source_path, parameters)
+    index = UtilityIndex.open(index_path, source_path, parameters)
+    if index is None:
+        reader = MergedDataReader(source_path)
+        columns: dict[tuple[str], tuple[array, array, array, array]] = dict()
+        for transaction_id, (items, utilities, probabilities) in enumerate(reader):
+            _append_transaction(columns, transaction_id, items, utilities, probabilities, weighting)
+        index = UtilityIndex.write(index_path, columns, source_path, parameters, reader.transactions, reader.database_utility)
+
+    return {name: UtilityItem(name, *column) for name, column in index.items()}, index
@@ -0,0 +1,859 @@
+from typing import List, Callable, Iterable, Optional
+import heapq
+import itertools
+import math
+import multiprocessing
+import os
+import sys
+import time
+from collections import defaultdict
+import numpy as np
+from mining_kernel.utility_item import UtilityItem, TopKCollector, ItemsetStore, PairTable, SearchStats, bounded_join, extend_join, extend_item, transaction_utilities, compact_items, merge_transactions, evaluate_itemset, transaction_seeds, TransactionSample, write_checkpoint, read_checkpoint, PROBABILITY_TOLERANCE
+from mining_kernel.strategies import Ordering, UtilityOrdering, ProbabilityBound
+
+# One search kernel for the three variants: they differ only in the strategies it is configured with
+# (branch ordering, join pruning; item weighting is applied by the helpers when the utility lists are built).
+
+class MiningKernel:
+    FRONTIER_PURGE_SIZE = 1 << 12
+    PROGRESS_INTERVAL = 1.0
+    CHECKPOINT_INTERVAL = 60.0
+    CANDIDATE_FACTOR = 2
+
+    def __init__(self, utility_dict: dict[UtilityItem], top_k: int | List[int], min_sup: int = 0, store_capacity: int = 0, pair_table: PairTable = None, trace_path: str = None, ordering: Ordering = None, join_pruning: ProbabilityBound = None, compact: bool = False, merge: bool = False):
+        # A list of K values is mined in one pass, one top-K per K (see run)
+        self.top_ks: List[int] = sorted(set(top_k)) if isinstance(top_k, (list, tuple)) else [top_k]
+        self.TOP_K: int = self.top_ks[-1]
+        self.min_sup: float = min_sup
+        self.min_utility = 0
+        # The threshold never drops below this (partitioned mining collects every itemset above it)
+        self.utility_floor: float = 0
+        # Threshold-raising initialization (see __raise_threshold): the seed itemsets of each K and the floor they
+        # give it
+        self.raise_threshold: bool = True
+        self.__seeds: dict[int, List[frozenset]] = dict()
+        self.__raised_floors: dict[int, float] = dict()
+        self.__raised_floor = 0.0
+        self.utility_dicts: dict[tuple[str], UtilityItem] = utility_dict
+        self.itemset_store: ItemsetStore = ItemsetStore(dict(), store_capacity)
+        self.top_k_candidates: TopKCollector = TopKCollector(self.TOP_K)
+        self.top_k_results: dict[int, List[UtilityItem]] = dict()
+        self.timings: dict = dict()
+        self.pair_table: Optional[PairTable] = pair_table
+        self.ordering: Ordering = ordering or UtilityOrdering()
+        self.join_pruning: ProbabilityBound = join_pruning or ProbabilityBound()
+        # Compact mode mines float32 / int32 / uint32 columns (see compact_items, validate_compact)
+        self.compact: bool = compact
+        # Merge identical transactions over the items that pass min_sup before searching (see merge_transactions)
+        self.merge: bool = merge
+        # Single items at least this dense get dense vectors for the joins they are the tail of (None: all sparse; the
+        # vectors add to the memory of the columns, DENSE_DENSITY is a reasonable share to turn it on with)
+        self.dense_density: Optional[float] = None
+        self.transaction_utility: np.ndarray = np.zeros(0)
+        self.stats: SearchStats = SearchStats()
+        # When set, run() writes the stats there as a JSON trace
+        self.trace_path: Optional[str] = trace_path
+        # Incremental mode: every mined single item (before the min_sup filter), the joins the last run generated (kept
+        # for update() unless keep_joins is off) and, during an update, the previous run's joins it extends
+        self.keep_joins: bool = True
+        self.__single_items: dict[tuple[str], UtilityItem] = dict()
+        self.__generated_joins: dict[frozenset, UtilityItem] = dict()
+        self.__previous_joins: dict[frozenset, UtilityItem] = dict()
+        # Canonical item order (ascending TWU): every itemset is named in it, whatever path generated it
+        self.item_order: dict[str, int] = dict()
+        self.__first_new_tid = 0
+        self.expandable_itemset: List[UtilityItem] = list() 
+        # Parallel mode: the threshold the workers share, and the expansions they share a node budget on
+        self.shared_min_utility = None
+        self.shared_expanded = None
+        # Multi-K mode: children joined once and replayed for every K, and the path each child was joined under
+        self.__shared_children: dict[int, List[UtilityItem]] = dict()
+        self.__paths: dict[int, List[float]] = dict()
+        self.__join_seconds = 0.0
+        # Anytime mode: run() stops at the deadline / node budget, and exact tells whether the search finished
+        self.exact = True
+        self.__deadline: Optional[float] = None
+        self.__node_budget: Optional[int] = None
+        self.__progress: Optional[Callable[[dict], None]] = None
+        self.__next_progress = 0.0
+        self.__run_start = 0.0
+        self.__first_expanded = 0
+        self.__first_generated = 0
+        self.__stopped = False
+        # Checkpointing: run() saves the search state there every CHECKPOINT_INTERVAL seconds and resumes from it
+        self.__checkpoint_path: Optional[str] = None
+        self.__next_checkpoint = 0.0
+
+    def __sort(self, input_list: List[UtilityItem], key_func: Callable[[UtilityItem], float], reverse: bool = True):
+        return sorted(input_list, key=key_func, reverse=reverse)
+
+    def __get_expandable(self, utility_list: List[UtilityItem], min_utility):
+        return list(filter(lambda item: self.__is_promising(item, min_utility), utility_list))
+
+    def __set_min_utility(self):
+        min_utility = max(self.top_k_candidates.min_utility, self.utility_floor, self.__raised_floor)
+        if self.shared_min_utility is not None:
+            # The K-th best a worker has found is a lower bound on the K-th best of them all; the weakest of a
+            # top-K that is not full yet is not, since a worker only sees its own branch
+            if len(self.top_k_candidates) < self.TOP_K:
+                min_utility = max(self.utility_floor, self.__raised_floor)
+            with self.shared_min_utility.get_lock():
+                min_utility = max(min_utility, self.shared_min_utility.value)
+                self.shared_min_utility.value = min_utility
+        if min_utility > self.min_utility:
+            self.stats.threshold(min_utility)
+        self.min_utility = min_utility
+
+    def __get_item_utility(self, name: tuple[str]):
+        return self.itemset_store.get(name)
+
+    def __is_able_to_combine(self, item1: UtilityItem, item2: UtilityItem):
+        if item1.shares_transactions(item2):
+            return True
+        self.stats.counters["not_combinable"] += 1
+        return False
+
+
+    def __priority(self, item: UtilityItem):
+        return self.ordering.priority(item)
+
+    def __order(self, item_utilities: List[UtilityItem]):
+        return self.ordering.order(item_utilities)
+
+    # --- Search engine ---
+    # Best-first over an explicit frontier instead of recursion: the most promising node is expanded next, so
+    # min_utility rises early and more of the space is pruned. A node still joins only with the siblings after it
+    # in its parent's ordered child list; entries that stop being promising are skipped or purged, never expanded.
+    # Promising is judged on TWU, which bounds the node's whole subtree in any join order: utility + remaining
+    # utility only bounds it when the children extend the node in the order the remaining utilities were summed in,
+    # and neither the best-first order nor the ordered child lists keep to that.
+
+    def __find_top_k_bayesian_networks(self, item_utilities: List[UtilityItem], expand: Callable[[List[UtilityItem], int], List[UtilityItem]], resumed: dict = None, roots: Iterable[int] = None):
+        # roots: the indexes of item_utilities to search from (all of them by default)
+        if resumed is None:
+            frontier: list = list()
+            self.__pushes = itertools.count()
+            purge_size = self.FRONTIER_PURGE_SIZE
+            self.__push(frontier, item_utilities, roots)
+        else:
+            frontier, purge_size = resumed["frontier"], resumed["purge_size"]
+            self.__pushes = itertools.count(resumed["pushes"])
+
+        counters = self.stats.counters
+        while frontier:
+            if self.__out_of_budget():
+                # Exact anyway when nothing left on the frontier could still reach the top-K
+                self.exact = self.exact and not any(self.__is_promising(entry[2][entry[3]]) for entry in frontier)
+                break
+            self.__report_progress(frontier)
+            self.__save_checkpoint(frontier, purge_size)
+            if self.shared_min_utility is not None and self.shared_min_utility.value > self.min_utility:
+                # Another worker raised the threshold
+                self.__set_min_utility()
+            _, _, siblings, index = heapq.heappop(frontier)
+            if not self.__is_promising(siblings[index]):
+                self.__count_pruned(siblings[index])
+                continue
+
+            next_item_utilities = expand(siblings, index)
+            depth = len(siblings[index].ITEM)
+            counters["expanded"] += 1
+            if self.shared_expanded is not None:
+                with self.shared_expanded.get_lock():
+                    self.shared_expanded.value += 1
+            counters["generated"] += len(next_item_utilities)
+            self.stats.expanded_by_depth[depth] += 1
+            self.stats.generated_by_depth[depth + 1] += len(next_item_utilities)
+            for new_item in next_item_utilities:
+                self.__process_new_item(new_item)
+            self.__push(frontier, self.__order(next_item_utilities))
+
+            if len(frontier) > purge_size:
+                size = len(frontier)
+                counters["pruned_raised_threshold"] += sum(self.__saved_by_raised_threshold(entry[2][entry[3]]) for entry in frontier if not self.__is_promising(entry[2][entry[3]]))
+                frontier = [entry for entry in frontier if self.__is_promising(entry[2][entry[3]])]
+                counters["pruned_frontier_purge"] += size - len(frontier)
+                heapq.heapify(frontier)
+                purge_size = max(2 * len(frontier), self.FRONTIER_PURGE_SIZE)
+        self.__report_progress(frontier, force=True)
+        if self.__checkpoint_path is not None:
+            # A run stopped by its budget can be resumed; a finished one has nothing left to resume
+            if not self.exact:
+                self.__save_checkpoint(frontier, purge_size, force=True)
+            elif os.path.exists(self.__checkpoint_path):
+                os.remove(self.__checkpoint_path)
+
+    def __push(self, frontier: list, item_utilities: List[UtilityItem], indexes: Iterable[int] = None):
+        for index in range(len(item_utilities)) if indexes is None else indexes:
+            item = item_utilities[index]
+            # min_utility never decreases, so a node that is not promising now never will be
+            if self.__is_promising(item):
+                heapq.heappush(frontier, (-self.__priority(item), next(self.__pushes), item_utilities, index))
+            else:
+                self.__count_pruned(item)
+
+    def __count_pruned(self, item: UtilityItem):
+        self.stats.counters["pruned_not_promising"] += 1
+        if self.__saved_by_raised_threshold(item):
+            self.stats.counters["pruned_raised_threshold"] += 1
+
+    def __saved_by_raised_threshold(self, item: UtilityItem):
+        # Nodes saved: pruned only because of the raised floor, the top-K so far would still have kept them
+        return self.__is_promising(item, max(self.top_k_candidates.min_utility, self.utility_floor))
+
+    # --- Threshold-raising initialization ---
+    # Before the search, exact lower bounds that need no join join the single items' utilities: the itemsets of the
+    # highest-utility transactions (transaction_seeds) and, with a pair table, the exact utility of every pair that
+    # passes min_sup. Their K-th best is a lower bound on the K-th utility of the result, so the search starts just
+    # below it instead of at the single items' K-th. Should the search end below that bound without having reached
+    # the seeds itself, they are evaluated and offered to the top-K.
+
+    def __raise_threshold(self):
+        start = time.perf_counter()
+        single_utilities = sorted((item.sum_utility for item in self.utility_dicts.values()), reverse=True)
+        seeds = transaction_seeds(self.utility_dicts, self.TOP_K, self.min_sup) if self.raise_threshold else []
+        if self.raise_threshold and self.pair_table is not None:
+            best = dict(seeds)
+            for first, second, mass, utility in self.pair_table.pairs():
+                if (first,) in self.utility_dicts and (second,) in self.utility_dicts and mass > self.min_sup * (1 + PROBABILITY_TOLERANCE):
+                    name = frozenset((first, second))
+                    best[name] = max(best.get(name, utility), utility)
+            seeds = sorted(best.items(), key=lambda seed: -seed[1])
+        # The seeds of a smaller K are the first ones of the largest K, as a single-K run would find them
+        for top_k in self.top_ks:
+            utilities = sorted(single_utilities + [utility for _, utility in seeds[:top_k]], reverse=True)
+            raised = utilities[top_k - 1] if len(utilities) >= top_k else 0
+            self.__seeds[top_k] = [name for name, _ in seeds[:top_k]]
+            self.__raised_floors[top_k] = raised * (1 - 1e-9)
+        # Reported for the largest K
+        self.stats.initial_threshold = {
+            "single_items": single_utilities[self.TOP_K - 1] if len(single_utilities) >= self.TOP_K else 0,
+            "raised": raised,
+            "seeds": len(seeds),
+            "evaluated": 0,
+            "seconds": time.perf_counter() - start
+        }
+
+    def __offer_seeds(self):
+        top_k = self.top_k_candidates.TOP_K
+        if self.top_k_candidates.min_utility >= self.__raised_floors[top_k]:
+            return
+        found = {frozenset(item.ITEM) for item in self.top_k_candidates.get_top_k_candidates()}
+        for name in self.__seeds[top_k]:
+            if name in found:
+                continue
+            item = evaluate_itemset(self.utility_dicts, self.__canonical(name))
+            self.stats.initial_threshold["evaluated"] += 1
+            # Same rule as the search's insertions
+            if self.join_pruning.keeps(item, self.min_sup) and item.sum_utility > self.min_utility:
+                self.top_k_candidates.push(item)
+                self.__set_min_utility()
+
+    # --- Anytime mode ---
+    # The budget is checked before each expansion; when it runs out the frontier is dropped and the top-K found so
+    # far is the result. Progress events go to the callback at most every PROGRESS_INTERVAL seconds.
+
+    def __out_of_budget(self):
+        if self.__stopped:
+            return True
+        expanded = self.stats.counters["expanded"] - self.__first_expanded if self.shared_expanded is None else self.shared_expanded.value
+        if self.__node_budget is not None and expanded >= self.__node_budget:
+            self.__stopped = True
+        elif self.__deadline is not None and time.monotonic() >= self.__deadline:
+            self.__stopped = True
+        return self.__stopped
+
+    def __report_progress(self, frontier: list, force: bool = False):
+        if self.__progress is None:
+            return
+        now = time.monotonic()
+        if not force and now < self.__next_progress:
+            return
+        self.__next_progress = now + self.PROGRESS_INTERVAL
+        self.__progress({
+            "seconds": now - self.__run_start,
+            "expanded": self.stats.counters["expanded"] - self.__first_expanded,
+            "generated": self.stats.counters["generated"] - self.__first_generated,
+            "min_utility": self.min_utility,
+            # Upper estimate: entries that stopped being promising are only dropped when popped or purged
+            "frontier": len(frontier),
+            "exact": self.exact
+        })
+
+    # --- Checkpoints ---
+    # The state the rest of the search depends on: the frontier (entries share their sibling lists, which pickle
+    # keeps shared), the push counter that breaks priority ties, the top-K, min_utility, the itemset store and the
+    # stats. The rest of run() is deterministic and simply runs again before resuming.
+
+    def __run_key(self):
+        # A checkpoint is only resumed by the run that wrote it
+        return (
+            type(self.ordering).__name__, self.TOP_K, self.min_sup, self.utility_floor, self.raise_threshold, self.merge, self.compact,
+            len(self.transaction_utility), float(self.transaction_utility.sum()), tuple(sorted(self.item_order))
+        )
+
+    def __save_checkpoint(self, frontier: list, purge_size: int, force: bool = False):
+        if self.__checkpoint_path is None or (not force and time.monotonic() < self.__next_checkpoint):
+            return
+        write_checkpoint(self.__checkpoint_path, {
+            "run": self.__run_key(),
+            "frontier": frontier,
+            "pushes": next(self.__pushes),
+            "purge_size": purge_size,
+            "utility_dicts": self.utility_dicts,
+            "top_k_candidates": self.top_k_candidates,
+            "min_utility": self.min_utility,
+            "generated_joins": self.__generated_joins,
+            "itemset_store": self.itemset_store,
+            "stats": self.stats
+        })
+        # Counted from the end of the write, so a slow disk does not turn the search into checkpointing
+        self.__next_checkpoint = time.monotonic() + self.CHECKPOINT_INTERVAL
+
+    def __resume(self):
+        if not os.path.exists(self.__checkpoint_path):
+            return None
+        state = read_checkpoint(self.__checkpoint_path)
+        if state["run"] != self.__run_key():
+            raise ValueError(f"Checkpoint {self.__checkpoint_path} was written by another run (K, min_sup, variant or database differ)")
+        self.utility_dicts = state["utility_dicts"]
+        self.top_k_candidates = state["top_k_candidates"]
+        self.min_utility = state["min_utility"]
+        self.__generated_joins = state["generated_joins"]
+        self.itemset_store = state["itemset_store"]
+        self.stats = state["stats"]
+        # The budget and progress counts start from the resumed counters
+        self.__first_expanded = self.stats.counters["expanded"]
+        self.__first_generated = self.stats.counters["generated"]
+        self.stats.counters["resumed"] += 1
+        return state
+
+    def __expand(self, item_utilities: List[UtilityItem], index: int):
+        current = item_utilities[index]
+        next_item_utilities = []
+
+        for next_current in item_utilities[index + 1:]:
+            if not self.__is_able_to_combine(current, next_current):
+                continue
+
+            new_item = self.__try_combine(current, next_current)
+            if new_item is None:
+                continue
+
+            next_item_utilities.append(new_item)
+        return next_item_utilities
+
+    # --- Parallel search ---
+    # Each worker runs the best-first search over the top-level branches it is handed and keeps its own top-K. Their
+    # thresholds are shared both ways: a worker publishes its K-th best as soon as it rises (a lower bound on the
+    # K-th best of the whole database) and picks up the others' before every expansion, so a branch is pruned by
+    # what the other branches found too. Only the sums of each branch's top-K are sent back and merged into the
+    # parent's, which joins the columns of the final top-K itself. The top-K utilities are the serial run's; among
+    # itemsets tied at the K-th utility, which ones are kept can differ.
+
+    def __find_in_parallel(self, processes: int):
+        context = multiprocessing.get_context()
+        self.shared_min_utility = context.Value("d", self.min_utility)
+        self.shared_expanded = context.Value("q", 0) if self.__node_budget is not None else None
+        # Most promising branches first, as the serial search takes them
+        branch_order = sorted(range(len(self.expandable_itemset)), key=lambda index: -self.__priority(self.expandable_itemset[index]))
+        try:
+            with context.Pool(processes, initializer=_init_worker, initargs=(self,)) as pool:
+                branches = [pool.apply_async(_explore_branch, (index,)) for index in branch_order]
+                for position, branch in enumerate(branches):
+                    top_k, stats, exact = branch.get()
+                    self.stats.merge(stats)
+                    self.exact = self.exact and exact
+                    # All of them: the K-th best was published by the worker that found it, so it is not above the
+                    # shared threshold
+                    for item in top_k:
+                        self.top_k_candidates.push(item)
+                    self.__set_min_utility()
+                    self.__report_progress(branches[position + 1:])
+            # Pushed again best first, so ties keep their order
+            top_k = [item if item.tids is not None else self.__evaluate(item) for item in self.top_k_candidates.get_top_k_candidates()]
+            self.top_k_candidates = TopKCollector(self.TOP_K)
+            for item in top_k:
+                self.top_k_candidates.push(item)
+            self.__report_progress([], force=True)
+        finally:
+            self.shared_min_utility = None
+            self.shared_expanded = None
+
+    def __evaluate(self, item: UtilityItem):
+        evaluated = evaluate_itemset(self.utility_dicts, item.ITEM)
+        evaluated.twu = item.twu
+        if self.keep_joins:
+            self.__generated_joins[frozenset(item.ITEM)] = evaluated
+        return evaluated
+
+    def __lower_bound(self, path_utilities: List[float]):
+        # Multi-K mode: every run's threshold is at least the K-th best utility generated on the path
+        return path_utilities[-1] if len(path_utilities) >= self.TOP_K else float("-inf")
+
+    def explore_branch(self, index: int):
+        # In a worker: the search below one top-level branch, with this branch's own top-K and stats; the progress
+        # callback and the joins kept for update() stay with the parent
+        self.top_k_candidates = TopKCollector(self.TOP_K)
+        for item in self.utility_dicts.values():
+            self.top_k_candidates.push(item)
+        self.stats = SearchStats()
+        self.__first_expanded = self.__first_generated = 0
+        self.__progress = None
+        self.keep_joins = False
+        self.exact = True
+        self.__set_min_utility()
+        self.__find_top_k_bayesian_networks(self.expandable_itemset, self.__expand, roots=[index])
+        return [item.without_columns() for item in self.top_k_candidates.get_top_k_candidates() if len(item.ITEM) > 1], self.stats, self.exact
+
+    # --- Helper methods ---
+
+    def __is_promising(self, item: UtilityItem, min_utility: float = None) -> bool:
+        # Nothing in the subtree of a node beats its TWU (same margin as bounded_join)
+        return item.twu * (1 + 1e-9) > (self.min_utility if min_utility is None else min_utility)
+
+    def __canonical(self, items: tuple[str]):
+        return tuple(sorted(items, key=self.item_order.__getitem__))
+
+    def __try_combine(self, item1: UtilityItem, item2: UtilityItem):
+        item_small, item_big = self.__sort([item1, item2], key_func=lambda x: x.existance, reverse=False)
+        # Each node only joins the siblings after it, so every itemset is joined at most once per run
+        name = self.__canonical(set(item_small.ITEM).union(item_big.ITEM))
+        if self.pair_table is not None and self.join_pruning.is_hopeless_pair(self.pair_table, item_small, item_big, self.min_sup, self.min_utility):
+            self.stats.counters["pruned_pair_table"] += 1
+            return None
+        new_item = self.__create_new_item_utility(item_small, item_big, name)
+        if new_item and self.join_pruning.keeps(new_item, self.min_sup):
+            return new_item
+        if new_item is not None:
+            self.stats.counters["pruned_min_sup_join"] += 1
+        return None
+
+    def __process_new_item(self, item: UtilityItem):
+        self.itemset_store.put(item)
+        if self.keep_joins:
+            self.__generated_joins[frozenset(item.ITEM)] = item
+        if item.sum_utility > self.min_utility:
+            self.stats.counters["top_k_insertions"] += 1
+            self.top_k_candidates.push(item)
+            self.__set_min_utility()
+
+
+    def get_store_stats(self):
+        return self.itemset_store.stats()
+
+    def get_join_stats(self):
+        counters = self.stats.counters
+        return {"joins": counters["joins"], "abandoned": counters["abandoned_joins"], "extended": counters["extended_joins"], "pair_pruned": counters["pruned_pair_table"]}
+
+    def get_stats(self):
+        return {**self.stats.as_dict(), "store": self.itemset_store.stats()}
+
+    def get_top_k_candidates(self, top_k: int = None):
+        if top_k is None:
+            return self.top_k_candidates.get_top_k_candidates()
+        return self.top_k_results[top_k]
+
+    def __create_new_item_utility(self, old_item_1: UtilityItem, old_item_2: UtilityItem, name: tuple[str]):
+        item1_set = set(old_item_1.ITEM)
+        tail_item = tuple(item for item in old_item_2.ITEM if item not in item1_set)
+        if not tail_item:
+            return None
+
+        tail: UtilityItem = self.__get_item_utility(tail_item)
+        if self.join_pruning.is_hopeless_join(old_item_1, tail, self.min_sup):
+            self.stats.counters["pruned_support_bitmap"] += 1
+            return None
+        joined = self.__previous_joins.get(frozenset(name))
+        if joined is not None:
+            self.stats.counters["extended_joins"] += 1
+            return extend_join(joined, old_item_1, tail, self.__first_new_tid, self.transaction_utility, self.min_sup, self.min_utility, name)
+
+        new_item = bounded_join(old_item_1, tail, self.transaction_utility, self.min_sup, self.min_utility, name)
+        self.stats.counters["joins"] += 1
+        if tail.dense is not None:
+            self.stats.counters["dense_joins"] += 1
+        if new_item is None:
+            self.stats.counters["abandoned_joins"] += 1
+        return new_item
+
+    def __get_valid_min_support_candidates(self, utility_dict: dict[str, UtilityItem]):
+        return {
+            name: item
+            for name, item in utility_dict.items()
+            if item.sum_prob >= self.min_sup
+        }
+
+    def run(self, processes: int = 1, deadline: float = None, node_budget: int = None, progress: Callable[[dict], None] = None, checkpoint: str = None):
+        # deadline: seconds from now, node_budget: expansions; past either the top-K found so far is returned with
+        # exact=False. progress gets periodic events (nodes explored, min_utility, frontier size). checkpoint: file
+        # the search state is saved to, and resumed from when it exists.
+        if checkpoint is not None and (len(self.top_ks) > 1 or processes > 1):
+            raise ValueError("Checkpoints hold the serial single-K search, run it with processes=1 and one K")
+        start = time.perf_counter()
+        self.__run_start = time.monotonic()
+        self.__deadline = self.__run_start + deadline if deadline is not None else None
+        self.__node_budget = node_budget
+        self.__progress = progress
+        self.__next_progress = self.__run_start + self.PROGRESS_INTERVAL
+        self.__first_expanded = self.stats.counters["expanded"]
+        self.__first_generated = self.stats.counters["generated"]
+        self.__stopped = False
+        self.exact = True
+        # Every run mines from scratch: the top-K and threshold of an earlier run do not carry over
+        self.top_k_candidates = TopKCollector(self.TOP_K)
+        self.min_utility = 0
+        self.__checkpoint_path = checkpoint
+        self.__next_checkpoint = self.__run_start + self.CHECKPOINT_INTERVAL
+        self.__single_items = self.utility_dicts
+        self.transaction_utility = transaction_utilities(self.utility_dicts)
+        # Remove candidates where: candidate.prob < min support
+        self.utility_dicts = self.__get_valid_min_support_candidates(self.utility_dicts)
+        self.stats.counters["pruned_min_sup_single"] += len(self.__single_items) - len(self.utility_dicts)
+        if self.merge:
+            self.__merge_transactions()
+        if self.compact:
+            self.utility_dicts = compact_items(self.utility_dicts)
+        dense_transactions = self.dense_density * len(self.transaction_utility) if self.dense_density is not None else math.inf
+        self.utility_dicts = {name: item.prepared(self.transaction_utility, len(item.tids) >= dense_transactions) for name, item in self.utility_dicts.items()}
+        self.itemset_store = ItemsetStore(self.utility_dicts, self.itemset_store.capacity)
+        twu = {name[0]: item.twu for name, item in self.utility_dicts.items()}
+        self.item_order = {item: rank for rank, item in enumerate(sorted(twu, key=lambda item: (twu[item], item)))}
+        self.__generated_joins = dict()
+        self.__raise_threshold()
+        # Find expandable itemset to expand, first top k candidate to return
+        self.expandable_itemset = self.__order(self.__get_expandable(list(self.utility_dicts.values()), self.min_utility))
+        self.stats.counters["pruned_not_expandable"] += len(self.utility_dicts) - len(self.expandable_itemset)
+        self.stats.add_phase("filter", time.perf_counter() - start)
+
+        search_start = time.perf_counter()
+        if len(self.top_ks) > 1:
+            if processes > 1:
+                raise ValueError("Multi-K mining replays one shared search serially, run it with processes=1")
+            self.__find_for_each_k(search_start - start)
+        else:
+            self.__raised_floor = self.__raised_floors[self.TOP_K]
+            resumed = self.__resume() if checkpoint is not None else None
+            if resumed is None:
+                for item in self.utility_dicts.values():
+                    self.top_k_candidates.push(item)
+                # Set first min utility
+                self.__set_min_utility()
+            # Mine top K candidates
+            if processes > 1:
+                self.__find_in_parallel(processes)
+            else:
+                self.__find_top_k_bayesian_networks(self.expandable_itemset, self.__expand, resumed)
+            self.__offer_seeds()
+            self.top_k_results = {self.TOP_K: self.top_k_candidates.get_top_k_candidates()}
+            self.timings = {"seconds": time.perf_counter() - start}
+        self.stats.add_phase("search", time.perf_counter() - search_start)
+        if self.trace_path is not None:
+            self.stats.write_trace(self.trace_path)
+        return self.get_top_k_candidates(), self.exact
+
+    def __merge_transactions(self):
+        # Remaining utilities keep the pruned items, so every bound (and the top-K) is the one of the unmerged lists
+        self.utility_dicts, representatives = merge_transactions(self.utility_dicts, len(self.transaction_utility))
+        merged_away = len(self.transaction_utility) - len(np.unique(representatives))
+        self.transaction_utility = np.bincount(representatives, weights=self.transaction_utility, minlength=len(self.transaction_utility))
+        self.stats.counters["merged_transactions"] += merged_away
+
+    # --- Multi-K mining ---
+    # Every K runs its own serial search, but the children of a node are joined once and replayed to each of
+    # them. A node's children are joined against the largest-K threshold local to its path, which no run's
+    # min_utility is ever below, so a replayed child list can only carry extra itemsets that never reach any top-K.
+
+    def __find_for_each_k(self, prepare_seconds: float):
+        self.__join_seconds = 0.0
+        self.__paths = {id(item): heapq.nlargest(self.TOP_K, (item.sum_utility for item in self.utility_dicts.values())) for item in self.expandable_itemset}
+        self.timings = {"shared": 0.0, "per_k": dict()}
+        self.top_k_results = dict()
+        try:
+            # The largest K runs last, so top_k_candidates ends up holding its result
+            for top_k in self.top_ks:
+                start, join_seconds = time.perf_counter(), self.__join_seconds
+                self.top_k_candidates = TopKCollector(top_k)
+                self.min_utility = 0
+                for item in self.utility_dicts.values():
+                    self.top_k_candidates.push(item)
+                self.__raised_floor = self.__raised_floors[top_k]
+                self.__set_min_utility()
+                self.__find_top_k_bayesian_networks(self.expandable_itemset, self.__expand_shared)
+                self.__offer_seeds()
+                self.top_k_results[top_k] = self.top_k_candidates.get_top_k_candidates()
+                self.timings["per_k"][top_k] = time.perf_counter() - start - (self.__join_seconds - join_seconds)
+        finally:
+            self.__shared_children = dict()
+            self.__paths = dict()
+        self.timings["shared"] = prepare_seconds + self.__join_seconds
+
+    def __expand_shared(self, item_utilities: List[UtilityItem], index: int):
+        current = item_utilities[index]
+        next_item_utilities = self.__shared_children.get(id(current))
+        if next_item_utilities is not None:
+            return next_item_utilities
+
+        start = time.perf_counter()
+        path_utilities = self.__paths[id(current)]
+        live_min_utility, self.min_utility = self.min_utility, self.__lower_bound(path_utilities)
+        try:
+            next_item_utilities = self.__expand(item_utilities, index)
+        finally:
+            self.min_utility = live_min_utility
+        path_utilities = heapq.nlargest(self.TOP_K, path_utilities + [item.sum_utility for item in next_item_utilities])
+        self.__paths.update((id(item), path_utilities) for item in next_item_utilities)
+        self.__shared_children[id(current)] = next_item_utilities
+        self.__join_seconds += time.perf_counter() - start
+        return next_item_utilities
+
+    # --- Incremental mode ---
+    # Appended transactions extend the single-item utility lists and the search is run again over the merged
+    # lists, so the top-K is the one a full re-run gives. Joins the previous run generated only merge the appended
+    # transactions instead of re-joining the old ones.
+
+    def update(self, utility_dict: dict[tuple[str], UtilityItem], processes: int = 1):
+        # utility_dict covers only the appended transactions, numbered after the mined ones (first_transaction_id)
+        first_tid = min((int(item.tids[0]) for item in utility_dict.values() if len(item.tids)), default=len(self.transaction_utility))
+        if first_tid < len(self.transaction_utility):
+            raise ValueError(f"Appended transactions start at tid {first_tid}, before the end of the mined ones ({len(self.transaction_utility)})")
+
+        single_items = dict(self.__single_items)
+        for name, delta in utility_dict.items():
+            single_items[name] = extend_item(single_items[name], delta) if name in single_items else delta
+        # Merged lists are rebuilt from scratch, so their joins cannot be extended with the appended transactions
+        previous_joins = dict(self.__generated_joins) if not self.merge else dict()
+        self.__previous_joins = previous_joins
+        self.__first_new_tid = first_tid
+        self.utility_dicts = single_items
+        counters = self.stats.counters
+        joins, extended_joins = counters["joins"], counters["extended_joins"]
+        try:
+            result = self.run(processes)
+        finally:
+            self.__previous_joins = dict()
+        self.stats.incremental = {
+            "previous_joins": len(previous_joins),
+            "previous_joins_bytes": sum(item.nbytes for item in previous_joins.values()),
+            "extended_joins": counters["extended_joins"] - extended_joins,
+            "joins": counters["joins"] - joins
+        }
+        if self.trace_path is not None:
+            self.stats.write_trace(self.trace_path)
+        return result
+
+    # --- Approximate mode ---
+    # The search runs on a TransactionSample, whose utilities and supports estimate the full ones, and keeps
+    # CANDIDATE_FACTOR * K candidates. The verify pass joins only those candidates on the full lists and returns the
+    # best K by exact utility; without it the sample's top-K is returned with its estimates.
+
+    def run_approximate(self, sample_fraction: float, strata: int = 1, verify: bool = True, seed: int = 0, processes: int = 1):
+        if len(self.top_ks) > 1:
+            raise ValueError("Approximate mining mines a single K")
+        start = time.perf_counter()
+        single_items = self.utility_dicts
+        sample = TransactionSample(single_items, sample_fraction, strata, seed)
+        top_k = self.TOP_K
+        self.TOP_K = self.CANDIDATE_FACTOR * top_k
+        self.top_ks = [self.TOP_K]
+        self.utility_dicts = sample.single_items
+        # The pair bounds hold for the full database, not for the estimates
+        pair_table, self.pair_table = self.pair_table, None
+        try:
+            candidates, _ = self.run(processes)
+        finally:
+            # Back to the full lists: top_k_candidates holds the approximate result until the next run() / update(),
+            # which starts from them
+            self.TOP_K, self.top_ks = top_k, [top_k]
+            self.pair_table = pair_table
+            self.utility_dicts = self.__single_items = single_items
+            self.transaction_utility = transaction_utilities(single_items)
+            # Joins of the sample are not joins of the database
+            self.itemset_store = ItemsetStore(dict(), self.itemset_store.capacity)
+            self.__generated_joins = dict()
+        sample_seconds = time.perf_counter() - start
+
+        estimates = []
+        for item in candidates:
+            utility_error, support_error = sample.standard_errors(evaluate_itemset(sample.single_items, item.ITEM))
+            estimates.append({"itemset": item.ITEM, "estimated_utility": item.sum_utility, "utility_error": utility_error, "estimated_support": item.sum_prob, "support_error": support_error})
+        if verify:
+            verified = [evaluate_itemset(single_items, item.ITEM) for item in candidates]
+            for estimate, item in zip(estimates, verified):
+                estimate["utility"], estimate["support"] = item.sum_utility, item.sum_prob
+            # The search keeps single items at min_sup and joins above it
+            result = [item for item in verified if (item.sum_prob >= self.min_sup if len(item.ITEM) == 1 else self.join_pruning.keeps(item, self.min_sup))]
+        else:
+            result = candidates
+        self.top_k_candidates = TopKCollector(top_k)
+        for item in result:
+            self.top_k_candidates.push(item)
+        self.min_utility = self.top_k_candidates.min_utility
+        self.top_k_results = {top_k: self.top_k_candidates.get_top_k_candidates()}
+        self.exact = False
+
+        report = {
+            "sample_fraction": sample_fraction,
+            "strata": strata,
+            "sampled_transactions": sample.size,
+            "transactions": sample.transactions,
+            "candidates": len(candidates),
+            "verified": verify,
+            "itemsets": estimates,
+            **self.__sample_accuracy(estimates, top_k, verify),
+            "seconds": {"sample": sample_seconds, "verify": time.perf_counter() - start - sample_seconds}
+        }
+        return self.get_top_k_candidates(), report
+
+    def __sample_accuracy(self, estimates: List[dict], top_k: int, verify: bool):
+        # Accuracy of the returned top-K, expected from the standard errors: estimated_recall is the mean chance that
+        # a returned itemset truly beats the best one left out of it, ranking_error the expected number of returned
+        # itemsets each is misordered with. Verified, the returned utilities are exact and what was left out is
+        # everything the sample did not keep as a candidate, estimated at most as much as the weakest candidate.
+        # Verified runs also measure the sample's own top-K against the exact utilities of the candidates
+        # (sample_recall: share of the returned top-K it held; sample_ranking_error: mean rank displacement).
+        if verify:
+            returned = [(item.sum_utility, 0.0) for item in self.get_top_k_candidates()]
+            left_out = estimates[-1] if len(estimates) >= self.CANDIDATE_FACTOR * top_k else None
+        else:
+            returned = [(estimate["estimated_utility"], estimate["utility_error"]) for estimate in estimates[:top_k]]
+            left_out = estimates[top_k] if len(estimates) > top_k else None
+        threshold, threshold_error = (left_out["estimated_utility"], left_out["utility_error"]) if left_out is not None else (0, 0)
+        accuracy = {
+            "estimated_recall": sum(_normal_cdf(utility - threshold, math.hypot(error, threshold_error)) for utility, error in returned) / max(1, len(returned)),
+            "ranking_error": sum(
+                _normal_cdf(-abs(utility - other_utility), math.hypot(error, other_error))
+                for index, (utility, error) in enumerate(returned) for other, (other_utility, other_error) in enumerate(returned) if other != index
+            ) / max(1, len(returned))
+        }
+        if verify:
+            sample_top = estimates[:top_k]
+            kept = {item.ITEM for item in self.get_top_k_candidates()}
+            exact_rank = {estimate["itemset"]: rank for rank, estimate in enumerate(sorted(estimates, key=lambda estimate: -estimate["utility"]))}
+            accuracy["sample_recall"] = sum(estimate["itemset"] in kept for estimate in sample_top) / max(1, len(kept))
+            accuracy["sample_ranking_error"] = sum(abs(rank - exact_rank[estimate["itemset"]]) for rank, estimate in enumerate(sample_top)) / max(1, len(sample_top))
+        return accuracy
+
+
+def _normal_cdf(difference: float, error: float):
+    # Probability that a normal estimate with this standard error is truly above zero
+    if error == 0:
+        return 1.0 if difference > 0 else 0.5 if difference == 0 else 0.0
+    return 0.5 * (1 + math.erf(difference / (error * math.sqrt(2))))
+
+
+def validate_compact(make_miner: Callable[[bool], MiningKernel], processes: int = 1):
+    # Validation mode: mines with make_miner(compact=True) and make_miner(compact=False) and compares the two top-Ks.
+    # Differences are expected only for itemsets within PROBABILITY_TOLERANCE of min_sup or of the K-th utility.
+    miners = {}
+    for compact in (True, False):
+        miner = make_miner(compact)
+        start = time.perf_counter()
+        miner.run(processes)
+        miners[compact] = (miner, time.perf_counter() - start)
+    (compact_miner, compact_seconds), (full_miner, full_seconds) = miners[True], miners[False]
+    compact_top = {item.ITEM: item for item in compact_miner.get_top_k_candidates()}
+    full_top = {item.ITEM: item for item in full_miner.get_top_k_candidates()}
+
+    def is_borderline(item: UtilityItem):
+        tolerance = PROBABILITY_TOLERANCE * max(1, abs(full_miner.min_sup))
+        return abs(item.sum_prob - full_miner.min_sup) <= tolerance or abs(item.sum_utility - full_miner.min_utility) <= PROBABILITY_TOLERANCE * max(1, abs(full_miner.min_utility))
+
+    differing = [item for name, item in full_top.items() if name not in compact_top] + [item for name, item in compact_top.items() if name not in full_top]
+    probability_error = max(
+        (abs(compact_top[name].sum_prob - item.sum_prob) / max(1, abs(item.sum_prob)) for name, item in full_top.items() if name in compact_top),
+        default=0.0
+    )
+    return {
+        "identical": not differing and [item.ITEM for item in compact_miner.get_top_k_candidates()] == [item.ITEM for item in full_miner.get_top_k_candidates()],
+        "within_tolerance": probability_error <= PROBABILITY_TOLERANCE and all(is_borderline(item) for item in differing),
+        "differing": [item.ITEM for item in differing],
+        "max_probability_error": probability_error,
+        "single_item_bytes": {
+            "compact": sum(item.nbytes for item in compact_miner.utility_dicts.values()),
+            "float64": sum(item.nbytes for item in full_miner.utility_dicts.values())
+        },
+        "seconds": {"compact": compact_seconds, "float64": full_seconds}
+    }
+
+
+def mine_partitioned(make_miner: Callable[[dict, int, float], MiningKernel], partitions: Callable[[], Iterable[dict]], top_k: int, min_sup: float = 0, processes: int = 1):
+    # Partitioned (out-of-core) mining. partitions() yields the single-item lists of one partition at a time (tids
+    # local to it) and is scanned three times, so only one partition is in memory at once:
+    #  1. utility, expected support and TWU of every single item. The K-th best utility of the single items that
+    #     pass min_sup is a lower bound on the K-th best utility of the database, and so is the K-th best of a
+    #     partition's single items that pass min_sup there and its transaction_seeds.
+    #  2. each partition mines (make_miner(utility_dict, top_k, min_sup) with no K and min_sup 0) every itemset of
+    #     those items whose local utility is above its share of the bound (partition utility / database utility).
+    #     An itemset at or above the bound in the database is at or above its share in at least one partition,
+    #     so the union of the local candidates holds the top-K.
+    #  3. one verification scan sums the exact utility and expected support of every candidate.
+    start = time.perf_counter()
+    utility, support, twu = defaultdict(float), defaultdict(float), defaultdict(float)
+    partition_utility = []
+    partition_bytes = 0
+    seed_bound = 0
+    join_pruning = ProbabilityBound()
+    for single_items in partitions():
+        transaction_utility = transaction_utilities(single_items)
+        partition_utility.append(transaction_utility.sum())
+        partition_bytes = max(partition_bytes, sum(item.nbytes for item in single_items.values()))
+        for (item,), utility_list in single_items.items():
+            utility[item] += utility_list.sum_utility
+            support[item] += utility_list.sum_prob
+            twu[item] += transaction_utility[utility_list.tids].sum()
+        seeds = transaction_seeds(single_items, top_k, min_sup)
+        local = sorted([item.sum_utility for item in single_items.values() if item.sum_prob >= min_sup] + [utility for _, utility in seeds], reverse=True)
+        if len(local) >= top_k:
+            seed_bound = max(seed_bound, local[top_k - 1])
+    frequent = {item for item in support if support[item] >= min_sup}
+    bound = max(heapq.nlargest(top_k, (utility[item] for item in frequent))[-1] if len(frequent) >= top_k else 0, seed_bound)
+    database_utility = sum(partition_utility)
+    # Results are named in the canonical order of the unpartitioned run (ascending TWU)
+    item_order = {item: rank for rank, item in enumerate(sorted(frequent, key=lambda item: (twu[item], item)))}
+    statistics_seconds = time.perf_counter() - start
+
+    candidates = {frozenset((item,)) for item in frequent if utility[item] >= bound}
+    local_candidates = []
+    for index, single_items in enumerate(partitions()):
+        miner = make_miner({name: item for name, item in single_items.items() if name[0] in frequent}, sys.maxsize, 0)
+        miner.utility_floor = bound * partition_utility[index] / database_utility * (1 - 1e-9) if database_utility else 0
+        # Every itemset above the floor is wanted, there is no K to raise the threshold for
+        miner.raise_threshold = False
+        local, _ = miner.run(processes)
+        local = [frozenset(item.ITEM) for item in local if len(item.ITEM) > 1 and item.sum_utility > miner.utility_floor]
+        local_candidates.append(len(local))
+        candidates.update(local)
+        join_pruning = miner.join_pruning
+    mining_seconds = time.perf_counter() - start - statistics_seconds
+
+    totals = {name: UtilityItem(name) for name in sorted(tuple(sorted(candidate, key=item_order.__getitem__)) for candidate in candidates)}
+    for single_items in partitions():
+        for name, total in totals.items():
+            if all((item,) in single_items for item in name):
+                total.add_partition(evaluate_itemset(single_items, name))
+    top_k_candidates = TopKCollector(top_k)
+    for name, total in totals.items():
+        # Single items are kept at min_sup, joins above it, as in the search
+        if total.sum_prob >= min_sup if len(name) == 1 else join_pruning.keeps(total, min_sup):
+            top_k_candidates.push(total)
+
+    return top_k_candidates.get_top_k_candidates(), {
+        "partitions": len(partition_utility),
+        "bound": bound,
+        "local_candidates": local_candidates,
+        "candidates": len(candidates),
+        "largest_partition_bytes": partition_bytes,
+        "seconds": {"statistics": statistics_seconds, "mining": mining_seconds, "verification": time.perf_counter() - start - statistics_seconds - mining_seconds}
+    }
+
+
+_worker_miner: Optional[MiningKernel] = None
+
+def _init_worker(miner: MiningKernel):
+    global _worker_miner
+    _worker_miner = miner
+
+def _explore_branch(index: int):
+    return _worker_miner.explore_branch(index)
+
@@ -0,0 +1,99 @@
+from typing import List
+from mining_kernel.utility_item import UtilityItem, PairTable
+
+# Strategies the mining kernel is configured with; each variant is one combination of them.
+
+
+class Ordering:
+    # Branch ordering: the best-first priority of a node, and the order of a child list (which fixes the siblings each
+    # child joins with)
+    def priority(self, item: UtilityItem):
+        return item.sum_utility + item.sum_ru
+
+    def order(self, item_utilities: List[UtilityItem]):
+        return item_utilities
+
+    def add_transactions(self, transactions: int, database_utility: float):
+        pass
+
+
+class UtilityOrdering(Ordering):
+    # Naive: utility + remaining utility as the priority, children kept in join order
+    pass
+
+
+class HeuristicOrdering(Ordering):
+    # Heuristic and user-define: utility + remaining utility normalized by the database utility, plus the share of
+    # transactions the itemset exists in; children sorted by it
+    def __init__(self, transactions: int, database_utility: float):
+        self.transactions = transactions
+        self.database_utility = database_utility
+
+    def add_transactions(self, transactions: int, database_utility: float):
+        self.transactions += transactions
+        self.database_utility += database_utility
+
+    def calculate_heuristic(self, item: UtilityItem):
+        return (item.sum_utility + item.sum_ru) / self.database_utility + item.existance / self.transactions
+
+    def priority(self, item: UtilityItem):
+        return self.calculate_heuristic(item)
+
+    def order(self, item_utilities: List[UtilityItem]):
+        return sorted(item_utilities, key=self.calculate_heuristic, reverse=True)
+
+
+class ProbabilityBound:
+    # Join pruning on the expected support: pairs the pair table rules out, joins whose shared transactions cannot
+    # reach min_sup, and joined itemsets whose support is not above it
+    def is_hopeless_pair(self, pair_table: PairTable, item_small: UtilityItem, item_big: UtilityItem, min_sup: float, min_utility: float):
+        # Pair bounds hold for every itemset containing the pair: its TWU caps the utility of the join and all of
+        # its descendants, its joint mass caps the support (scaled when probabilities can exceed 1)
+        tail_item = [item for item in item_big.ITEM if item not in item_small.ITEM]
+        growth = max(1, pair_table.max_probability) ** (len(item_small.ITEM) + len(tail_item) - 2)
+        for tail in tail_item:
+            for item in item_small.ITEM:
+                count, mass, utility = pair_table.get(item, tail)
+                if not count or utility * (1 + 1e-9) <= min_utility or mass * growth * (1 + 1e-9) <= min_sup:
+                    return True
+        return False
+
+    def is_hopeless_join(self, item: UtilityItem, tail: UtilityItem, min_sup: float):
+        # Every shared transaction adds at most max_weight * max_prob * max_prob to the joined support; only worth
+        # checking when both sides have bitmaps, otherwise the count costs as much as the join
+        return item.bitmap is not None and tail.bitmap is not None \
+            and item.common_count(tail) * item.max_weight * item.max_prob * tail.max_prob * (1 + 1e-9) <= min_sup
+
+    def keeps(self, item: UtilityItem, min_sup: float):
+        return item.sum_prob > min_sup
+
+
+class ItemWeighting:
+    # Item weighting, applied when the utility lists are built (mining_kernel.builders): utility and probability
+    # factors of an item, and whether a transaction is walked from its last item (the order items are first seen and
+    # remaining utilities summed in)
+    backwards = False
+
+    def factors(self, item: str):
+        return 1, 1
+
+    def parameters(self):
+        # What the built lists depend on, recorded by the on-disk index
+        return {"backwards": self.backwards}
+
+
+class CompositeItemWeighting(ItemWeighting):
+    # User-define: composite items such as "(XY)" get their utility and probability boosted; transactions are walked
+    # backwards, as the variant always built them
+    backwards = True
+
+    def __init__(self, support_probability: float = 0, support_utility: float = 0):
+        self.support_probability = support_probability
+        self.support_utility = support_utility
+
+    def factors(self, item: str):
+        is_supported = 1 if '(' in item else 0
+        return is_supported * self.support_utility + 1, self.support_probability * is_supported + 1
+
+    def parameters(self):
+        return {**super().parameters(), "support_probability": self.support_probability, "support_utility": self.support_utility}
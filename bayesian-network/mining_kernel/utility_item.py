@@ -0,0 +1,669 @@
+import copy
+import heapq
+import json
+import os
+import pickle
+import time
+from collections import OrderedDict, defaultdict
+from typing import Optional
+import numpy as np
+
+POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+def merge_positions(tids: np.ndarray, other_tids: np.ndarray):
+    # Sorted-merge of two tid columns: positions in tids and in other_tids of the shared transactions
+    if not len(tids) or not len(other_tids):
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    positions = np.searchsorted(other_tids, tids)
+    positions[positions == len(other_tids)] = 0
+    matched = other_tids[positions] == tids
+    return np.flatnonzero(matched), positions[matched]
+
+class UtilityItem:
+    def __init__(self, item: tuple[str], tids=(), probabilities=(), utilities=(), remaining_utilities=(), weights=None):
+        self.ITEM = item
+        # Compact columns (see compact_items) keep their dtypes, anything else is stored as int64 / float64
+        probabilities = np.asarray(probabilities)
+        if probabilities.dtype != np.float32:
+            probabilities = probabilities.astype(np.float64, copy=False)
+        tids = np.asarray(tids)
+        if tids.dtype != np.uint32:
+            tids = tids.astype(np.int64, copy=False)
+        # Transactions with a (near) zero probability do not support the itemset; when there are none the columns are
+        # kept as given, so memory-mapped ones (see UtilityIndex) stay mapped instead of being copied
+        keep = np.abs(probabilities) > 1e-9
+        if keep.all():
+            keep = slice(None)
+        self.tids: np.ndarray = tids[keep]
+        self.probabilities: np.ndarray = probabilities[keep]
+        self.utilities: np.ndarray = np.asarray(utilities)[keep]
+        self.remaining_utilities: np.ndarray = np.asarray(remaining_utilities)[keep]
+        # Merged transactions (see merge_transactions) stand for weights[i] identical ones
+        self.weights: Optional[np.ndarray] = None if weights is None else np.asarray(weights)[keep]
+        self.sum_utility = self.utilities.sum().item()
+        self.sum_ru = self.remaining_utilities.sum().item()
+        if self.weights is None:
+            self.sum_prob = self.probabilities.sum(dtype=np.float64).item()
+            self.existance = len(self.tids)
+            self.max_weight = 1
+        else:
+            self.sum_prob = (self.probabilities * self.weights).sum(dtype=np.float64).item()
+            self.existance = int(self.weights.sum())
+            self.max_weight = self.weights.max().item() if len(self.tids) else 1
+        self.max_prob = self.probabilities.max().item() if len(self.tids) else 0
+        self.bitmap: np.ndarray = self.__build_bitmap()
+        # Dense mode (see prepared): probability, utility and remaining utility vectors over all transactions
+        self.dense: Optional[tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+        # Transaction-weighted utility, set on the single items a run mines (see prepared) and on the joins: bounds
+        # every superset
+        self.twu: Optional[float] = None
+
+    def __len__(self):
+        return len(self.tids)
+
+    def __build_bitmap(self):
+        # Packed uint64 bitset of the tids, kept only while it is no larger than the tid column itself
+        if not len(self.tids) or len(self.tids) * 64 < self.tids[-1] + 1:
+            return None
+        flags = np.zeros((int(self.tids[-1]) // 64 + 1) * 64, dtype=bool)
+        flags[self.tids] = True
+        return np.packbits(flags, bitorder="little").view(np.uint64)
+
+    def prepared(self, transaction_utility: np.ndarray, dense: bool = False):
+        # Copy of a single item as a run mines it, sharing the columns, so the caller's lists are left as they were:
+        # its TWU and, dense, vectors over all transactions that are zero where the item is absent (a join with this
+        # item as its tail gathers them by tid instead of merging; they are held on top of the columns)
+        item = copy.copy(self)
+        item.twu = transaction_utility[self.tids].sum().item()
+        if dense:
+            columns = (self.probabilities, self.utilities, self.remaining_utilities)
+            item.dense = tuple(np.zeros(len(transaction_utility), dtype=column.dtype) for column in columns)
+            for vector, column in zip(item.dense, columns):
+                vector[self.tids] = column
+        return item
+
+    def shares_transactions(self, other: 'UtilityItem'):
+        if self.bitmap is not None and other.bitmap is not None:
+            words = min(len(self.bitmap), len(other.bitmap))
+            return bool(np.any(self.bitmap[:words] & other.bitmap[:words]))
+        return self.common_count(other) > 0
+
+    def common_count(self, other: 'UtilityItem'):
+        # Number of shared transactions: AND + popcount on the bitmaps, sorted merge when either side is sparse
+        if self.bitmap is not None and other.bitmap is not None:
+            words = min(len(self.bitmap), len(other.bitmap))
+            return int(POPCOUNT[(self.bitmap[:words] & other.bitmap[:words]).view(np.uint8)].sum())
+        small, big = (self, other) if len(self.tids) <= len(other.tids) else (other, self)
+        return small.join_indices(big)[0].size
+
+    def __position(self, id: int):
+        position = np.searchsorted(self.tids, id)
+        if position < len(self.tids) and self.tids[position] == id:
+            return position
+        return None
+
+    def get_probability(self, id: int):
+        position = self.__position(id)
+        return 0 if position is None else self.probabilities[position].item()
+
+    def get_utility(self, id: int):
+        position = self.__position(id)
+        return 0 if position is None else self.utilities[position].item()
+
+    def get_remaining(self, id: int):
+        position = self.__position(id)
+        return 0 if position is None else self.remaining_utilities[position].item()
+
+    def join_indices(self, other: 'UtilityItem'):
+        return merge_positions(self.tids, other.tids)
+
+    @property
+    def nbytes(self):
+        bitmap_nbytes = 0 if self.bitmap is None else self.bitmap.nbytes
+        weights_nbytes = 0 if self.weights is None else self.weights.nbytes
+        dense_nbytes = 0 if self.dense is None else sum(vector.nbytes for vector in self.dense)
+        return self.tids.nbytes + self.probabilities.nbytes + self.utilities.nbytes + self.remaining_utilities.nbytes + bitmap_nbytes + weights_nbytes + dense_nbytes
+
+    def without_columns(self):
+        # Copy with the sums only (what a parallel worker sends back)
+        item = copy.copy(self)
+        item.tids = item.probabilities = item.utilities = item.remaining_utilities = item.bitmap = item.weights = item.dense = None
+        return item
+
+    def add_partition(self, other: 'UtilityItem'):
+        # Partitioned mining: adds the sums of the same itemset over another partition (columns are not kept)
+        self.sum_utility += other.sum_utility
+        self.sum_ru += other.sum_ru
+        self.sum_prob += other.sum_prob
+        self.existance += other.existance
+        self.max_prob = max(self.max_prob, other.max_prob)
+        self.max_weight = max(self.max_weight, other.max_weight)
+
+    def __str__(self):
+        return f"Item name: {self.ITEM}, sum: {self.sum_utility}, probability: {self.sum_prob}, transactions: {self.existance}\n"
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __gt__(self, other: 'UtilityItem'):
+        return self.sum_utility > other.sum_utility
+
+    def __eq__(self, other):
+        return isinstance(other, UtilityItem) and self.ITEM == other.ITEM
+
+    def __hash__(self):
+        return hash(self.ITEM)
+
+
+JOIN_CHUNK = 1 << 15
+# Suggested miner.dense_density: single items present in at least this share of the transactions get dense vectors
+# (see UtilityItem.prepared)
+DENSE_DENSITY = 0.25
+
+def transaction_utilities(single_items: dict[tuple[str], UtilityItem]):
+    # TU of every transaction: the first item of a transaction carries the whole of it in utility + remaining
+    size = max((int(item.tids[-1]) + 1 for item in single_items.values() if len(item.tids)), default=0)
+    utilities = np.zeros(size)
+    for item in single_items.values():
+        utilities[item.tids] = np.maximum(utilities[item.tids], item.utilities + item.remaining_utilities)
+    return utilities
+
+def bounded_join(item: UtilityItem, tail: UtilityItem, transaction_utility: np.ndarray, min_sup: float, min_utility: float, name: tuple[str] = None):
+    # Merge item with a single-item tail one chunk of item's transactions at a time. Gives up (None) as soon as
+    # the support still reachable cannot beat min_sup, or the transaction utility still reachable cannot beat
+    # min_utility; TWU bounds every superset, unlike utility + remaining which the join order does not respect.
+    utilities = transaction_utility[item.tids]
+    probabilities = item.probabilities if item.weights is None else item.probabilities * item.weights
+    remaining_prob = item.sum_prob
+    remaining_utility = utilities.sum()
+    joined_prob = joined_utility = 0
+    chunks_1, chunks_tail = [], []
+
+    for start in range(0, len(item.tids), JOIN_CHUNK):
+        if (joined_prob + remaining_prob * tail.max_prob) * (1 + 1e-9) <= min_sup \
+                or (joined_utility + remaining_utility) * (1 + 1e-9) <= min_utility:
+            return None
+        stop = start + JOIN_CHUNK
+        if tail.dense is None:
+            matched, positions = merge_positions(item.tids[start:stop], tail.tids)
+            chunks_tail.append(positions)
+            tail_probabilities = tail.probabilities[positions]
+        else:
+            tail_probabilities = tail.dense[0][item.tids[start:stop]]
+            matched = np.flatnonzero(tail_probabilities)
+            tail_probabilities = tail_probabilities[matched]
+        chunks_1.append(matched + start)
+
+        joined_prob += (probabilities[start:stop][matched] * tail_probabilities).sum(dtype=np.float64)
+        joined_utility += utilities[start:stop][matched].sum()
+        remaining_prob -= probabilities[start:stop].sum(dtype=np.float64)
+        remaining_utility -= utilities[start:stop].sum()
+
+    if joined_prob * (1 + 1e-9) <= min_sup or joined_utility * (1 + 1e-9) <= min_utility:
+        return None
+
+    index_1 = np.concatenate(chunks_1)
+    if tail.dense is None:
+        index_tail = np.concatenate(chunks_tail)
+        tail_probabilities, tail_utilities, tail_remaining = tail.probabilities[index_tail], tail.utilities[index_tail], tail.remaining_utilities[index_tail]
+    else:
+        tail_probabilities, tail_utilities, tail_remaining = (vector[item.tids[index_1]] for vector in tail.dense)
+    new_item = UtilityItem(
+        item=name or tuple(item.ITEM + tail.ITEM),
+        tids=item.tids[index_1],
+        probabilities=item.probabilities[index_1] * tail_probabilities,
+        utilities=item.utilities[index_1] + tail_utilities,
+        remaining_utilities=np.minimum(item.remaining_utilities[index_1], tail_remaining),
+        weights=None if item.weights is None else item.weights[index_1]
+    )
+    new_item.twu = float(joined_utility)
+    return new_item
+
+def extend_join(joined: UtilityItem, item: UtilityItem, tail: UtilityItem, first_tid: int, transaction_utility: np.ndarray, min_sup: float, min_utility: float, name: tuple[str] = None):
+    # joined is item + tail over the transactions before first_tid: merge only the later ones onto it, then
+    # accept or reject it exactly as bounded_join would have
+    start, tail_start = np.searchsorted(item.tids, first_tid), np.searchsorted(tail.tids, first_tid)
+    index_1, index_tail = merge_positions(item.tids[start:], tail.tids[tail_start:])
+    index_1, index_tail = index_1 + start, index_tail + tail_start
+    new_item = UtilityItem(
+        item=name or joined.ITEM,
+        tids=np.concatenate((joined.tids, item.tids[index_1])),
+        probabilities=np.concatenate((joined.probabilities, item.probabilities[index_1] * tail.probabilities[index_tail])),
+        utilities=np.concatenate((joined.utilities, item.utilities[index_1] + tail.utilities[index_tail])),
+        remaining_utilities=np.concatenate((joined.remaining_utilities, np.minimum(item.remaining_utilities[index_1], tail.remaining_utilities[index_tail]))),
+        weights=None if joined.weights is None else np.concatenate((joined.weights, item.weights[index_1]))
+    )
+    new_item.twu = float(transaction_utility[new_item.tids].sum())
+    if new_item.sum_prob * (1 + 1e-9) <= min_sup or new_item.twu * (1 + 1e-9) <= min_utility:
+        return None
+    return new_item
+
+def extend_item(item: UtilityItem, delta: UtilityItem):
+    # Utility list of item over the old transactions followed by the appended ones
+    return UtilityItem(
+        item=item.ITEM,
+        tids=np.concatenate((item.tids, delta.tids)),
+        probabilities=np.concatenate((item.probabilities, delta.probabilities)),
+        utilities=np.concatenate((item.utilities, delta.utilities)),
+        remaining_utilities=np.concatenate((item.remaining_utilities, delta.remaining_utilities)),
+        weights=None if item.weights is None else np.concatenate((item.weights, delta.weights))
+    )
+
+def merge_transactions(single_items: dict[tuple[str], UtilityItem], transactions: int):
+    # Transactions that hold the same items, in the same remaining-utility order and with the same probabilities are
+    # merged into the first of them: utilities and remaining utilities add up, and it carries the number of
+    # transactions it stands for as a weight on its probabilities (expected support is not additive otherwise).
+    # Returns the merged items and, for every tid, the tid it was merged into.
+    representatives = np.arange(transactions)
+    items = list(single_items.values())
+    if not items:
+        return dict(single_items), representatives
+    which = np.repeat(np.arange(len(items)), [len(item.tids) for item in items])
+    columns = [np.concatenate([getattr(item, name) for item in items]) for name in ("tids", "probabilities", "utilities", "remaining_utilities")]
+    order = np.lexsort((which, -columns[3], columns[0]))
+    which = which[order]
+    tids, probabilities, utilities, remaining_utilities = (column[order] for column in columns)
+    # Already weighted lists (a TransactionSample) carry one weight per transaction
+    entry_weights = np.concatenate([item.weights for item in items])[order] if items[0].weights is not None else None
+
+    starts = np.flatnonzero(np.r_[True, tids[1:] != tids[:-1]])
+    lengths = np.diff(np.r_[starts, len(tids)])
+    keys = np.empty(len(tids), dtype=[("item", np.int64), ("probability", np.float64)])
+    keys["item"], keys["probability"] = which, probabilities
+    groups: dict[bytes, int] = dict()
+    group_of = np.array([groups.setdefault(keys[start:start + length].tobytes(), len(groups)) for start, length in zip(starts.tolist(), lengths.tolist())], dtype=np.int64)
+    if len(groups) == len(starts):
+        return dict(single_items), representatives
+
+    # Every entry adds into the same position of its group's first transaction
+    first = np.unique(group_of, return_index=True)[1]
+    target = np.repeat(starts[first][group_of], lengths) + np.arange(len(tids)) - np.repeat(starts, lengths)
+    utilities = np.bincount(target, weights=utilities, minlength=len(tids))
+    remaining_utilities = np.bincount(target, weights=remaining_utilities, minlength=len(tids))
+    weights = np.repeat(np.bincount(group_of, weights=None if entry_weights is None else entry_weights[starts]), lengths[first])
+    representatives[tids[starts]] = tids[starts][first][group_of]
+
+    is_first = np.zeros(len(starts), dtype=bool)
+    is_first[first] = True
+    kept = np.flatnonzero(np.repeat(is_first, lengths))
+    by_item = kept[np.argsort(which[kept], kind="stable")]
+    bounds = np.searchsorted(which[by_item], np.arange(len(items) + 1))
+    merged = dict()
+    for index, name in enumerate(single_items):
+        entries = np.sort(by_item[bounds[index]:bounds[index + 1]])
+        entry_weights = weights[np.searchsorted(kept, entries)]
+        merged[name] = UtilityItem(name, tids[entries], probabilities[entries], utilities[entries], remaining_utilities[entries], entry_weights)
+    return merged, representatives
+
+# Compact mode: float32 probabilities, int32 utilities (int64 once a transaction utility reaches 2**31, float64 when
+# they are not integral) and uint32 tids. A product of n float32 probabilities is within about n * 2**-24 of the
+# float64 one, and supports are summed in float64, so supports agree to PROBABILITY_TOLERANCE (relative); only
+# itemsets whose support or utility lies that close to min_sup or the K-th utility can be ranked differently.
+PROBABILITY_TOLERANCE = 1e-6
+
+def compact_dtypes(single_items: dict[tuple[str], UtilityItem]):
+    transaction_utility = transaction_utilities(single_items)
+    tid_dtype = np.uint32 if len(transaction_utility) < np.iinfo(np.uint32).max else np.int64
+    integral = all(
+        np.array_equal(column, np.floor(column))
+        for item in single_items.values() for column in (item.utilities, item.remaining_utilities)
+    )
+    if not integral:
+        utility_dtype = np.float64
+    elif transaction_utility.max(initial=0) < np.iinfo(np.int32).max:
+        utility_dtype = np.int32
+    else:
+        utility_dtype = np.int64
+    return tid_dtype, np.float32, utility_dtype
+
+def compact_items(single_items: dict[tuple[str], UtilityItem]):
+    # Joins inherit the dtypes of the single items, so converting these compacts the whole search
+    tid_dtype, probability_dtype, utility_dtype = compact_dtypes(single_items)
+    return {
+        name: UtilityItem(
+            name,
+            item.tids.astype(tid_dtype),
+            item.probabilities.astype(probability_dtype),
+            item.utilities.astype(utility_dtype),
+            item.remaining_utilities.astype(utility_dtype),
+            None if item.weights is None else compact_weights(item.weights)
+        )
+        for name, item in single_items.items()
+    }
+
+def compact_weights(weights: np.ndarray):
+    # Merge multiplicities are counts; sample weights (see TransactionSample) are not
+    return weights.astype(np.uint32) if np.array_equal(weights, np.floor(weights)) else weights.astype(np.float32)
+
+def evaluate_itemset(single_items: dict[tuple[str], UtilityItem], name: tuple[str]):
+    # Exact utility list of an itemset, joined straight from its single items without any bound
+    joined = single_items[name[:1]]
+    for item in name[1:]:
+        tail = single_items[(item,)]
+        index_1, index_tail = merge_positions(joined.tids, tail.tids)
+        joined = UtilityItem(
+            item=name,
+            tids=joined.tids[index_1],
+            probabilities=joined.probabilities[index_1] * tail.probabilities[index_tail],
+            utilities=joined.utilities[index_1] + tail.utilities[index_tail],
+            remaining_utilities=np.minimum(joined.remaining_utilities[index_1], tail.remaining_utilities[index_tail]),
+            weights=None if joined.weights is None else joined.weights[index_1]
+        )
+    return joined
+
+def transaction_seeds(single_items: dict[tuple[str], UtilityItem], top_k: int, min_sup: float):
+    # Exact lower bounds without a join: the itemset of a transaction (its items among single_items) has at least the
+    # utility it has there, and at least that transaction's share of the expected support (weight times the product
+    # of the probabilities). Walking the transactions by that utility, returns the first top_k distinct itemsets of
+    # two or more items whose share is above min_sup, with their utility lower bound.
+    items = [item for item in single_items.values() if len(item.tids)]
+    if not items:
+        return []
+    tids = np.concatenate([item.tids for item in items])
+    size = int(tids.max()) + 1
+    utility = np.bincount(tids, weights=np.concatenate([item.utilities for item in items]), minlength=size)
+    log_probability = np.bincount(tids, weights=np.log(np.concatenate([item.probabilities for item in items]).astype(np.float64)), minlength=size)
+    length = np.bincount(tids, minlength=size)
+    weight = np.ones(size)
+    for item in items:
+        if item.weights is not None:
+            weight[item.tids] = item.weights
+    # The margin covers the rounding of the compact columns
+    eligible = np.flatnonzero((length > 1) & (weight * np.exp(log_probability) > min_sup * (1 + PROBABILITY_TOLERANCE)))
+    order = eligible[np.argsort(-utility[eligible], kind="stable")]
+
+    seeds: dict[frozenset, float] = dict()
+    for start in range(0, len(order), 4 * top_k):
+        if len(seeds) >= top_k:
+            break
+        block = order[start:start + 4 * top_k]
+        sorted_block = np.sort(block)
+        members: dict[int, list[str]] = defaultdict(list)
+        for item in items:
+            positions = np.minimum(np.searchsorted(item.tids, sorted_block), len(item.tids) - 1)
+            for tid in sorted_block[item.tids[positions] == sorted_block].tolist():
+                members[tid].append(item.ITEM[0])
+        for tid in block.tolist():
+            seeds.setdefault(frozenset(members[tid]), utility[tid].item())
+    return list(seeds.items())[:top_k]
+
+class TransactionSample:
+    # Stratified random sample of the transactions (strata: equal-count bins of transaction utility, one stratum for
+    # a uniform sample), drawn without replacement with the same fraction in every stratum. Sampled transactions are
+    # renumbered and stand for N_s / n_s transactions of their stratum: utilities are scaled by it and it is the
+    # weight on their probabilities, so utilities and expected supports mined from the sample estimate the full ones.
+    def __init__(self, single_items: dict[tuple[str], UtilityItem], fraction: float, strata: int = 1, seed: int = 0):
+        if not 0 < fraction <= 1:
+            raise ValueError(f"The sample fraction must be in (0, 1], got {fraction}")
+        transaction_utility = transaction_utilities(single_items)
+        edges = np.quantile(transaction_utility, np.linspace(0, 1, strata + 1)[1:-1]) if len(transaction_utility) else np.zeros(0)
+        stratum_of_tid = np.searchsorted(edges, transaction_utility, side="right")
+        self.population: np.ndarray = np.bincount(stratum_of_tid, minlength=strata)
+        self.sampled: np.ndarray = np.where(self.population > 0, np.maximum(1, np.round(fraction * self.population)), 0).astype(np.int64)
+
+        rng = np.random.default_rng(seed)
+        selected = np.zeros(len(transaction_utility), dtype=bool)
+        for stratum in range(strata):
+            members = np.flatnonzero(stratum_of_tid == stratum)
+            selected[rng.choice(members, self.sampled[stratum], replace=False)] = True
+        sample_tid = np.cumsum(selected) - 1
+        self.stratum: np.ndarray = stratum_of_tid[selected]
+        self.scale: np.ndarray = self.population / np.maximum(self.sampled, 1)
+        self.size = int(selected.sum())
+        self.transactions = len(transaction_utility)
+
+        self.single_items: dict[tuple[str], UtilityItem] = dict()
+        for name, item in single_items.items():
+            keep = selected[item.tids]
+            tids = sample_tid[item.tids[keep]]
+            scale = self.scale[self.stratum[tids]]
+            weights = scale if item.weights is None else scale * item.weights[keep]
+            self.single_items[name] = UtilityItem(name, tids, item.probabilities[keep], item.utilities[keep] * scale, item.remaining_utilities[keep] * scale, weights)
+
+    def standard_errors(self, item: UtilityItem):
+        # Standard errors of the utility and expected support estimates of an itemset (its utility list over the
+        # sample): sum over strata of N_s^2 (1 - n_s / N_s) s_s^2 / n_s, s_s^2 the variance of the per-transaction
+        # values over the n_s sampled transactions (zero where the itemset is absent)
+        stratum = self.stratum[item.tids]
+        sampled = np.maximum(self.sampled, 1)
+        errors = []
+        for values in (item.utilities / self.scale[stratum], item.probabilities):
+            total = np.bincount(stratum, weights=values, minlength=len(sampled))
+            squares = np.bincount(stratum, weights=values ** 2, minlength=len(sampled))
+            variance = np.maximum(squares - total ** 2 / sampled, 0) / np.maximum(sampled - 1, 1)
+            errors.append(float(np.sqrt((self.population ** 2 * (1 - sampled / np.maximum(self.population, 1)) * variance / sampled).sum())))
+        return tuple(errors)
+
+
+class TopKCollector:
+    def __init__(self, top_k: int):
+        self.TOP_K: int = top_k
+        # Min-heap of (utility, -arrival, item): the root is the weakest of the kept candidates
+        self.__heap: list[tuple[float, int, UtilityItem]] = list()
+        self.__arrivals = 0
+
+    @property
+    def min_utility(self):
+        return self.__heap[0][0] if self.__heap else 0
+
+    def push(self, item: UtilityItem):
+        # On equal utility the later arrival ranks lower, so it is the one evicted
+        entry = (item.sum_utility, -self.__arrivals, item)
+        self.__arrivals += 1
+        if len(self.__heap) < self.TOP_K:
+            heapq.heappush(self.__heap, entry)
+        else:
+            heapq.heappushpop(self.__heap, entry)
+
+    def get_top_k_candidates(self):
+        return [item for _, _, item in sorted(self.__heap, reverse=True)]
+
+    def __len__(self):
+        return len(self.__heap)
+
+
+class SearchStats:
+    # Counters of a miner, cheap enough to leave on: integer bumps on the hot path and one history entry each time
+    # min_utility rises. Parallel workers keep their own for each branch, merged back into the parent's.
+    SEARCH_COUNTERS = (
+        "expanded", "generated", "top_k_insertions", "threshold_raises",
+        "pruned_min_sup_single", "pruned_not_expandable", "pruned_not_promising", "pruned_frontier_purge",
+        "pruned_raised_threshold", "merged_transactions", "resumed"
+    )
+    JOIN_COUNTERS = (
+        "not_combinable", "pruned_pair_table", "pruned_support_bitmap", "pruned_min_sup_join",
+        "joins", "abandoned_joins", "extended_joins", "dense_joins"
+    )
+
+    def __init__(self):
+        self.counters: dict[str, int] = dict.fromkeys(self.SEARCH_COUNTERS + self.JOIN_COUNTERS, 0)
+        self.expanded_by_depth: dict[int, int] = defaultdict(int)
+        self.generated_by_depth: dict[int, int] = defaultdict(int)
+        self.threshold_history: list[tuple[float, int, float]] = list()
+        self.phases: dict[str, float] = defaultdict(float)
+        # Threshold-raising initialization of the last run: K-th utility of the single items, of the items and seeds
+        self.initial_threshold: dict = dict()
+        # Last update(): the previous run's joins it could extend (count, bytes), and how many it extended / joined anew
+        self.incremental: dict = dict()
+        self.__start = time.perf_counter()
+
+    def threshold(self, min_utility: float):
+        self.counters["threshold_raises"] += 1
+        self.threshold_history.append((time.perf_counter() - self.__start, self.counters["expanded"], min_utility))
+
+    def add_phase(self, phase: str, seconds: float):
+        self.phases[phase] += seconds
+
+    def merge(self, other: 'SearchStats'):
+        for name, count in other.counters.items():
+            self.counters[name] += count
+        for depth, count in other.expanded_by_depth.items():
+            self.expanded_by_depth[depth] += count
+        for depth, count in other.generated_by_depth.items():
+            self.generated_by_depth[depth] += count
+
+    def as_dict(self):
+        return {
+            "counters": dict(self.counters),
+            "expanded_by_depth": dict(sorted(self.expanded_by_depth.items())),
+            "generated_by_depth": dict(sorted(self.generated_by_depth.items())),
+            "threshold_history": [
+                {"seconds": seconds, "expanded": expanded, "min_utility": min_utility}
+                for seconds, expanded, min_utility in self.threshold_history
+            ],
+            "phases": dict(self.phases),
+            "initial_threshold": dict(self.initial_threshold),
+            "incremental": dict(self.incremental)
+        }
+
+    def write_trace(self, path: str):
+        with open(path, "w") as file:
+            json.dump(self.as_dict(), file, indent=2)
+
+
+def write_checkpoint(path: str, state: dict):
+    # Written next to path and then renamed over it, so a crash mid-write leaves the previous checkpoint intact (and
+    # at most a stale .tmp the next write overwrites)
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as file:
+        pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+def read_checkpoint(path: str):
+    with open(path, "rb") as file:
+        return pickle.load(file)
+
+
+class ItemsetStore:
+    # Utility lists a later join can ask for. A join's tail is always a single item, so the single-item lists
+    # are pinned; the itemsets on the search frontier are held by the frontier itself. Generated itemsets are
+    # kept only in a bounded LRU (capacity 0 keeps none) and leave it through explicit eviction.
+    def __init__(self, single_items: dict[tuple[str], UtilityItem], capacity: int = 0):
+        self.__pinned = single_items
+        self.__cache: OrderedDict[tuple[str], UtilityItem] = OrderedDict()
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, name: tuple[str]):
+        item = self.__pinned.get(name)
+        if item is None:
+            item = self.__cache.get(name)
+            if item is not None:
+                self.__cache.move_to_end(name)
+        if item is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return item
+
+    def put(self, item: UtilityItem):
+        if self.capacity <= 0 or item.ITEM in self.__pinned:
+            return
+        self.__cache[item.ITEM] = item
+        self.__cache.move_to_end(item.ITEM)
+        while len(self.__cache) > self.capacity:
+            self.__cache.popitem(last=False)
+            self.evictions += 1
+
+    def evict(self, name: tuple[str]):
+        if self.__cache.pop(name, None) is not None:
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self.__pinned) + len(self.__cache)
+
+    def generated(self):
+        # Cached generated itemsets that still hold their columns
+        return {name: item for name, item in self.__cache.items() if item.tids is not None}
+
+    @property
+    def nbytes(self):
+        return sum(item.nbytes for item in self.__pinned.values()) + sum(item.nbytes for item in self.__cache.values())
+
+    def stats(self):
+        return {
+            "pinned": len(self.__pinned),
+            "cached": len(self.__cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "nbytes": self.nbytes
+        }
+
+
+class PairTable:
+    # EUCS-style co-occurrence table, filled in the same pass as the utility lists. For every item pair: the
+    # transactions holding both, their joint probability mass (the expected support of the pair), their summed
+    # transaction utility (pair TWU) and, when the item utilities are given, the utility of the pair itself.
+    # Small alphabets are frozen into dense matrices, larger ones stay a sparse dict of the pairs that occur.
+    DENSE_LIMIT = 1024
+
+    def __init__(self):
+        self.__pairs: dict[tuple[str, str], list] = dict()
+        self.__index: dict[str, int] = None
+        self.__matrices: tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray] = None
+        self.max_probability = 0
+
+    def add_transaction(self, items: list, probabilities: list, transaction_utility: float, utilities: list = None):
+        self.max_probability = max(self.max_probability, max(probabilities, default=0))
+        for position in range(len(items)):
+            for other in range(position + 1, len(items)):
+                key = (items[position], items[other]) if items[position] < items[other] else (items[other], items[position])
+                pair_utility = utilities[position] + utilities[other] if utilities is not None else 0.0
+                entry = self.__pairs.get(key)
+                if entry is None:
+                    self.__pairs[key] = [1, probabilities[position] * probabilities[other], transaction_utility, pair_utility]
+                else:
+                    entry[0] += 1
+                    entry[1] += probabilities[position] * probabilities[other]
+                    entry[2] += transaction_utility
+                    entry[3] += pair_utility
+
+    def freeze(self):
+        if self.__matrices is not None:
+            # Transactions were appended after an earlier freeze: fold the matrices back in and rebuild
+            names = list(self.__index)
+            for row, column in zip(*np.nonzero(np.triu(self.__matrices[0]))):
+                entry = self.__pairs.setdefault((names[row], names[column]), [0, 0.0, 0.0, 0.0])
+                for field, matrix in enumerate(self.__matrices):
+                    entry[field] += matrix[row, column].item()
+            self.__index = self.__matrices = None
+        names = sorted({name for pair in self.__pairs for name in pair})
+        if len(names) > self.DENSE_LIMIT:
+            return
+        self.__index = {name: index for index, name in enumerate(names)}
+        self.__matrices = (np.zeros((len(names), len(names)), dtype=np.int64),) + tuple(np.zeros((len(names), len(names))) for _ in range(3))
+        for (first, second), entry in self.__pairs.items():
+            row, column = self.__index[first], self.__index[second]
+            for field, matrix in enumerate(self.__matrices):
+                matrix[row, column] = matrix[column, row] = entry[field]
+        self.__pairs = dict()
+
+    def get(self, first: str, second: str):
+        # (co-occurrence count, joint probability mass, pair TWU); zeros for a pair that never occurs
+        if self.__matrices is not None:
+            row, column = self.__index.get(first), self.__index.get(second)
+            if row is None or column is None:
+                return 0, 0.0, 0.0
+            return tuple(matrix[row, column].item() for matrix in self.__matrices[:3])
+        key = (first, second) if first < second else (second, first)
+        return tuple(self.__pairs.get(key, (0, 0.0, 0.0, 0.0))[:3])
+
+    def pairs(self):
+        # (first, second, joint probability mass, pair utility) of every pair that occurs
+        if self.__matrices is not None:
+            names = list(self.__index)
+            counts, masses, _, utilities = self.__matrices
+            return [(names[row], names[column], masses[row, column].item(), utilities[row, column].item()) for row, column in zip(*np.nonzero(np.triu(counts)))]
+        return [(first, second, mass, utility) for (first, second), (_, mass, _, utility) in self.__pairs.items()]
+
+    def __len__(self):
+        if self.__matrices is not None:
+            return int(np.count_nonzero(self.__matrices[0])) // 2
+        return len(self.__pairs)
@@ -0,0 +1,82 @@
+import os
+import random
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from mining_kernel.builders import create_utility_dict
+from mining_kernel.miner import MiningKernel
+from mining_kernel.strategies import UtilityOrdering, HeuristicOrdering, ItemWeighting, CompositeItemWeighting
+from mining_kernel.utility_item import evaluate_itemset
+
+# The variants as kernel configurations, built straight from mining_kernel: the variant directories share their
+# module names and cannot be imported side by side
+VARIANTS = ["naive", "heuristic", "user_define"]
+
+
+def random_database(seed: int, transactions: int = 60, items: int = 8, max_items: int = 6, min_items: int = 1):
+    # Small database in the create_utility_dict format, with a few composite items for the user-define weighting
+    rng = random.Random(seed)
+    names = [chr(ord("A") + index) for index in range(items)]
+    names += ["(" + names[index] + names[index + 1] + ")" for index in range(0, items - 1, 3)]
+    database = []
+    for _ in range(transactions):
+        transaction_items = rng.sample(names, rng.randint(min(min_items, len(names)), min(max_items, len(names))))
+        database.append({
+            "items": transaction_items,
+            "quantities": [rng.randint(1, 5) for _ in transaction_items],
+            "profits": [rng.randint(1, 10) for _ in transaction_items],
+            "probabilities": [round(rng.uniform(0.3, 1.0), 2) for _ in transaction_items]
+        })
+    return database
+
+
+def weighting(variant: str):
+    return CompositeItemWeighting(0.2, 1.0) if variant == "user_define" else ItemWeighting()
+
+
+def build(variant: str, database: list, first_transaction_id: int = 0, pair_table=None):
+    return create_utility_dict(database, pair_table, first_transaction_id, weighting(variant))
+
+
+def make_miner(variant: str, utility_dict: dict, top_k, min_sup: float, transactions: int = None, database_utility: float = None, **kwargs):
+    if variant == "naive":
+        ordering = UtilityOrdering()
+    else:
+        transactions = transactions if transactions is not None else max(int(item.tids[-1]) + 1 for item in utility_dict.values())
+        database_utility = database_utility if database_utility is not None else sum(item.sum_utility for item in utility_dict.values())
+        ordering = HeuristicOrdering(transactions, database_utility)
+    return MiningKernel(utility_dict, top_k, min_sup, ordering=ordering, **kwargs)
+
+
+def brute_force_top_k(utility_dict: dict, top_k: int, min_sup: float):
+    # Utilities of the top-K over every itemset of the single items that pass min_sup: single items are kept at
+    # min_sup and joins above it, as in the search
+    singles = {name: item for name, item in utility_dict.items() if item.sum_prob >= min_sup}
+    names = [name[0] for name in singles]
+    utilities = [item.sum_utility for item in singles.values()]
+
+    def extend(itemset: tuple, start: int):
+        for index in range(start, len(names)):
+            joined = evaluate_itemset(singles, itemset + (names[index],))
+            if not len(joined.tids):
+                continue
+            if len(joined.ITEM) > 1 and joined.sum_prob > min_sup:
+                utilities.append(joined.sum_utility)
+            extend(joined.ITEM, index + 1)
+
+    extend((), 0)
+    return rounded(sorted(utilities, reverse=True)[:top_k])
+
+
+def rounded(utilities):
+    return [round(float(utility), 6) for utility in utilities]
+
+
+def utilities(top_k: list):
+    return rounded(sorted((item.sum_utility for item in top_k), reverse=True))
+
+
+@pytest.fixture(params=VARIANTS)
+def variant(request):
+    return request.param
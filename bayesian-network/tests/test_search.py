@@ -0,0 +1,19 @@
+import pytest
+from conftest import random_database, build, make_miner, brute_force_top_k, utilities
+
+# (top_k, min_sup) pairs; every database has at least top_k single items above min_sup
+SETTINGS = [(3, 0.5), (8, 0.5), (5, 3.0)]
+
+
+@pytest.mark.parametrize("seed", range(30))
+@pytest.mark.parametrize("top_k, min_sup", SETTINGS)
+def test_top_k_matches_brute_force(variant, seed, top_k, min_sup):
+    # Regression: the search used to prune on utility + remaining utility, which the best-first join order does not
+    # respect, and lost itemsets of the top-K on databases of long transactions like these
+    utility_dict = build(variant, random_database(seed, transactions=30 + 2 * seed, items=6 + seed % 4, max_items=10, min_items=4))
+    if sum(item.sum_prob >= min_sup for item in utility_dict.values()) < top_k:
+        pytest.skip("fewer single items than K above min_sup")
+    expected = brute_force_top_k(utility_dict, top_k, min_sup)
+    top, exact = make_miner(variant, utility_dict, top_k, min_sup).run()
+    assert exact
+    assert utilities(top) == expected
@@ -0,0 +1,71 @@
+import mmap
+import os
+import numpy as np
+import data.utility_index as utility_index
+from data.data_reader import MergedDataReader
+from mining_kernel.builders import create_utility_dict_from_index, create_utility_dict_from_reader
+from mining_kernel.strategies import ItemWeighting, CompositeItemWeighting
+from conftest import random_database
+
+
+def write_source(path, seed: int = 0):
+    with open(path, "w") as file:
+        for transaction in random_database(seed, transactions=200):
+            utilities = [quantity * profit for quantity, profit in zip(transaction["quantities"], transaction["profits"])]
+            file.write(f"{' '.join(transaction['items'])}:{sum(utilities)}:{' '.join(map(str, utilities))}:{' '.join(map(str, transaction['probabilities']))}\n")
+    return str(path)
+
+
+def is_mapped(column):
+    while column is not None:
+        if isinstance(column, mmap.mmap):
+            return True
+        column = getattr(column, "base", None)
+    return False
+
+
+def test_index_lists_match_reader_and_stay_mapped(tmp_path):
+    source = write_source(tmp_path / "database.txt")
+    utility_dict, _ = create_utility_dict_from_index(source)
+    expected = create_utility_dict_from_reader(MergedDataReader(source))
+    assert list(utility_dict) == list(expected)
+    for name, item in utility_dict.items():
+        assert np.array_equal(item.tids, expected[name].tids)
+        assert np.array_equal(item.utilities, expected[name].utilities)
+        assert np.array_equal(item.remaining_utilities, expected[name].remaining_utilities)
+        assert is_mapped(item.tids) and is_mapped(item.probabilities)
+
+
+def test_each_weighting_keeps_its_own_index(tmp_path):
+    source = write_source(tmp_path / "database.txt")
+    _, plain = create_utility_dict_from_index(source, weighting=ItemWeighting())
+    _, composite = create_utility_dict_from_index(source, weighting=CompositeItemWeighting(0.2, 1.0))
+    assert plain.path != composite.path
+    built = {path: os.stat(path).st_mtime_ns for path in (plain.path, composite.path)}
+    create_utility_dict_from_index(source, weighting=ItemWeighting())
+    create_utility_dict_from_index(source, weighting=CompositeItemWeighting(0.2, 1.0))
+    assert {path: os.stat(path).st_mtime_ns for path in built} == built
+
+
+def test_touched_source_is_hashed_once(tmp_path, monkeypatch):
+    source = write_source(tmp_path / "database.txt")
+    create_utility_dict_from_index(source)
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    hashed = []
+    digest = utility_index.file_digest
+    monkeypatch.setattr(utility_index, "file_digest", lambda path: hashed.append(path) or digest(path))
+    for _ in range(3):
+        _, index = create_utility_dict_from_index(source)
+        assert index.header["source"]["mtime_ns"] == stat.st_mtime_ns + 10 ** 9
+    assert hashed == [source]
+
+
+def test_changed_source_rebuilds_the_index(tmp_path):
+    source = write_source(tmp_path / "database.txt")
+    _, index = create_utility_dict_from_index(source)
+    write_source(source, seed=1)
+    utility_dict, rebuilt = create_utility_dict_from_index(source)
+    expected = create_utility_dict_from_reader(MergedDataReader(source))
+    assert rebuilt.header["source"]["sha256"] != index.header["source"]["sha256"]
+    assert {name: item.sum_utility for name, item in utility_dict.items()} == {name: item.sum_utility for name, item in expected.items()}
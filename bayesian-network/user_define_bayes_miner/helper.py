@@ -1,27 +1,24 @@
-from utility_item import UtilityItem
+import os
+import sys
+from utility_item import PairTable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-def create_utility_dict(database: list, support_probability: float = 0, support_utility: float = 0):
-    utilities: dict[tuple[str], UtilityItem] = dict()
+# The utility-list builders live in mining_kernel, shared by all three variants; user-define configures them with
+# composite-item weighting
+from mining_kernel import builders
+from mining_kernel.strategies import CompositeItemWeighting
 
-    for transaction_id, transaction in enumerate(database):
-        items: list = transaction.get("items")
-        quantities: list = transaction.get("quantities")
-        probabilities: list = transaction.get("probabilities")
-        profits: list = transaction.get("profits")
+def create_utility_dict(database: list, support_probability: float = 0, support_utility: float = 0, pair_table: PairTable = None, first_transaction_id: int = 0):
+    return builders.create_utility_dict(database, pair_table, first_transaction_id, CompositeItemWeighting(support_probability, support_utility))
+
+def create_utility_dict_from_reader(reader, support_probability: float = 0, support_utility: float = 0, pair_table: PairTable = None, first_transaction_id: int = 0):
+    return builders.create_utility_dict_from_reader(reader, pair_table, first_transaction_id, CompositeItemWeighting(support_probability, support_utility))
 
-        remaining_utility = 0
+def create_utility_dict_from_columns(offsets, items, quantities, profits, probabilities, item_names: list = None, support_probability: float = 0, support_utility: float = 0, first_transaction_id: int = 0):
+    return builders.create_utility_dict_from_columns(offsets, items, quantities, profits, probabilities, item_names, first_transaction_id, CompositeItemWeighting(support_probability, support_utility))
 
-        for index in range(len(items) - 1, -1, -1):
-            is_supported = 1 if '(' in items[index] else 0
-            item_name = tuple([items[index]])
-            if item_name not in utilities:
-                utilities[item_name] = UtilityItem(item=item_name)
-            item_utility = quantities[index] * profits[index] * (is_supported * support_utility + 1)
-            item_probability = probabilities[index] * (support_probability * is_supported + 1)
-            utilities[item_name].set_utility(transaction_id, item_probability, item_utility, remaining_utility)
-            remaining_utility += item_utility
-            
-    return utilities
+def create_utility_dict_from_index(source_path: str, index_path: str = None, support_probability: float = 0, support_utility: float = 0):
+    return builders.create_utility_dict_from_index(source_path, index_path, CompositeItemWeighting(support_probability, support_utility))
 
 def get_number_of_transaction(database: list):
     return len(database)